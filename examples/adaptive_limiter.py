@@ -0,0 +1,247 @@
+"""
+Adaptive (AIMD) Concurrency Limiter
+Finds the right number of in-flight LLM calls at runtime instead of
+relying on a fixed cap. Like TCP congestion control:
+
+    additive increase       - while calls succeed at normal latency and the
+                              limit is actually used, the limit grows by about
+                              one per round trip
+    multiplicative decrease - on overload (429, 5xx, timeouts) or a latency
+                              spike, the limit is cut (halved by default), at
+                              most once per round trip
+
+A latency spike is the short-term latency average exceeding
+`latency_tolerance` x the baseline (the lowest recent average, which drifts
+up slowly so a permanently slower provider becomes the new normal).
+
+The limiter is applied per LLM call (AdaptiveLimitedLLM), not per agent
+run: a run's latency depends on how many ReAct steps it takes, while one
+LLM call's latency reflects how loaded the provider is.
+
+The current limit, in-flight count and a history of limit changes are
+exposed through stats() and history for dashboards.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    limiter = AdaptiveLimiter(initial=4, max_limit=32)
+    llm = AdaptiveLimitedLLM(inner=OpenAI(temperature=0), limiter=limiter)
+    agent = initialize_agent(tools, llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION)
+    results = await run_queries(agent.arun, queries, max_concurrency=32)
+    print(limiter.stats())
+"""
+
+import asyncio
+import collections
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain.llms.base import LLM
+
+from resilience import is_retryable
+from streaming import forward_tokens
+
+
+class AdaptiveLimiter:
+    """Thread- and asyncio-safe concurrency limit adjusted by AIMD."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        min_samples: int = 10,
+    ):
+        """
+        Args:
+            initial: Starting limit
+            min_limit: Never go below this many calls in flight
+            max_limit: Never go above this many calls in flight
+            backoff: Factor applied to the limit on overload
+            latency_tolerance: Latency above this multiple of the baseline counts as overload
+            min_samples: Successful calls needed before latency is judged
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.history = collections.deque([(time.time(), initial)], maxlen=1000)  # (timestamp, limit)
+        self._limit = float(initial)
+        self._samples = 0
+        self._latency = None  # short-term average
+        self._baseline = None  # lowest recent short-term average
+        self._last_decrease = 0.0
+        self._async_waiters = collections.deque()
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """Block until a slot is free, then take it."""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def aacquire(self) -> None:
+        """Wait (without blocking the event loop) until a slot is free, then take it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """
+        Free a slot and adapt the limit to how the call went.
+
+        Args:
+            latency: Seconds the call took
+            error: The exception it raised, if any
+        """
+        with self._condition:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            if error is not None:
+                if is_retryable(error):
+                    self._decrease()
+            elif self._observe(latency):
+                self._decrease()
+            elif saturated:
+                self._increase()
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, collections.deque()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _observe(self, latency: float) -> bool:
+        """Update the latency averages; True when latency has spiked."""
+        self._samples += 1
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._baseline is None:
+            self._baseline = self._latency
+        else:
+            self._baseline = min(self._baseline * 1.002, self._latency)
+        return self._samples >= self.min_samples and self._latency > self.latency_tolerance * self._baseline
+
+    def _increase(self) -> None:
+        new_limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        if int(new_limit) > self.limit:
+            self.increases += 1
+            self.history.append((time.time(), int(new_limit)))
+        self._limit = new_limit
+
+    def _decrease(self) -> None:
+        # Calls already in flight were sent under the old limit; cut once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), math.floor(self._limit * self.backoff))
+        self.decreases += 1
+        self.history.append((time.time(), self.limit))
+
+    def wrap(self, func: Callable[[str], Any]) -> Callable[[str], Any]:
+        """Return a blocking function that runs func inside a limiter slot."""
+        def limited(*args, **kwargs):
+            self.acquire()
+            start = time.perf_counter()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self.release(time.perf_counter() - start, error)
+        return limited
+
+    def awrap(self, func: Callable[[str], Awaitable[Any]]) -> Callable[[str], Awaitable[Any]]:
+        """Return a coroutine function that awaits func inside a limiter slot."""
+        async def limited(*args, **kwargs):
+            await self.aacquire()
+            start = time.perf_counter()
+            error = None
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self.release(time.perf_counter() - start, error)
+        return limited
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, load and latency figures."""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting_async": len(self._async_waiters),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "latency_ms": None if self._latency is None else round(self._latency * 1e3, 1),
+                "baseline_ms": None if self._baseline is None else round(self._baseline * 1e3, 1),
+            }
+
+
+def _wake(waiter: "asyncio.Future") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveLimitedLLM(LLM):
+    """LLM wrapper that runs every call inside a slot of an AdaptiveLimiter."""
+
+    inner: Any
+    limiter: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        callbacks = forward_tokens(run_manager)
+        if hasattr(self.inner, "predict"):
+            return self.limiter.wrap(self.inner.predict)(prompt, stop=stop, callbacks=callbacks)
+        return self.limiter.wrap(self.inner)(prompt, stop=stop, callbacks=callbacks)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if not hasattr(self.inner, "apredict"):
+            return await asyncio.get_running_loop().run_in_executor(None, self._call, prompt, stop)
+        return await self.limiter.awrap(self.inner.apredict)(prompt, stop=stop)
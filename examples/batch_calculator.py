@@ -0,0 +1,339 @@
+"""
+Batch Calculator
+Evaluates many arithmetic expressions in one tool call with vectorized NumPy.
+
+Expressions are grouped by their shape (the same operators with different
+numbers, e.g. "25 * 37" and "12 * 4"); each shape is validated and compiled
+once by calc_engine and evaluated as a single NumPy expression over columns
+of numbers.
+Rows that float64 cannot reproduce exactly (huge integers, division by zero,
+complex results, powers with a float or negative exponent or base - NumPy's
+pow may differ from Python's in the last bit, ...) fall back to the scalar,
+cost-bounded calc_engine path, so every row gives the same answer
+calculate() would, errors included.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    calculate_batch("25 * 37; 100 / 4; 2 ** 10")
+    calculate_batch("x * y + 1 | x = 1, 2, 3 | y = 4, 5, 6")
+"""
+
+import ast
+import operator
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import calc_engine
+from calc_engine import ExpressionError
+
+# Largest number of rows evaluated in one call
+MAX_BATCH = 10_000
+
+# float64 represents every integer below this exactly
+EXACT_LIMIT = 2.0 ** 53
+
+# Numeric literals, in the order they appear in the expression
+NUMBER_PATTERN = re.compile(r"\d+\.?\d*|\.\d+")
+
+# Integer literals Python rejects ("007"), but not zeros inside a number ("100")
+LEADING_ZERO_PATTERN = re.compile(r"(?<![\d.])0\d")
+
+VECTOR_OPERATORS = {
+    operator.add: np.add,
+    operator.sub: np.subtract,
+    operator.mul: np.multiply,
+    operator.truediv: np.true_divide,
+    operator.floordiv: np.floor_divide,
+    operator.pow: np.power,
+    operator.pos: np.positive,
+    operator.neg: np.negative,
+}
+
+
+def _shape(source: str) -> Tuple[str, Tuple[str, ...], list]:
+    """
+    Split a normalized expression into its shape and its numbers.
+
+    "25*37+1.5" becomes ("_c0*_c1+_c2", ("_c0", "_c1", "_c2"), [25, 37, 1.5]).
+    """
+    tokens = NUMBER_PATTERN.findall(source)
+    names = tuple(f"_c{i}" for i in range(len(tokens)))
+    counter = iter(names)
+    shape = NUMBER_PATTERN.sub(lambda match: next(counter), source)
+    numbers = [float(token) if "." in token else int(token) for token in tokens]
+    return shape, names, numbers
+
+
+def _vectorize(node: ast.expr):
+    """
+    Compile a validated expression tree into a NumPy closure.
+
+    The closure takes a dict of float64 columns and a dict of boolean
+    "is integer" columns, and returns (values, is_int, peak) where peak is the
+    largest magnitude seen at any node of the expression for each row.
+    """
+    if isinstance(node, ast.Constant):
+        value = _to_float(node.value)
+        is_int = type(node.value) is int
+        return lambda columns, int_columns: (value, is_int, abs(value))
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda columns, int_columns: (columns[name], int_columns[name], np.abs(columns[name]))
+
+    if isinstance(node, ast.UnaryOp):
+        op = VECTOR_OPERATORS[calc_engine.UNARY_OPERATORS[type(node.op)]]
+        operand = _vectorize(node.operand)
+
+        def unary(columns, int_columns):
+            values, is_int, peak = operand(columns, int_columns)
+            return op(values), is_int, peak
+
+        return unary
+
+    scalar_op = calc_engine.BINARY_OPERATORS[type(node.op)]
+    op = VECTOR_OPERATORS[scalar_op]
+    left = _vectorize(node.left)
+    right = _vectorize(node.right)
+
+    def binary(columns, int_columns):
+        a, a_int, a_peak = left(columns, int_columns)
+        b, b_int, b_peak = right(columns, int_columns)
+        values = op(a, b)
+        if scalar_op is operator.truediv:
+            is_int = False
+        elif scalar_op is operator.pow:
+            is_int = np.logical_and(np.logical_and(a_int, b_int), np.greater_equal(b, 0))
+        else:
+            is_int = np.logical_and(a_int, b_int)
+        peak = np.maximum(np.maximum(a_peak, b_peak), np.abs(values))
+        if scalar_op is operator.pow:
+            # Only integer powers are exact; an infinite peak sends the others to the scalar path
+            peak = np.where(is_int, peak, np.inf)
+        return values, is_int, peak
+
+    return binary
+
+
+def _evaluate_columns(tree: ast.expr, columns: Dict[str, Sequence], rows: int, scalar) -> List:
+    """
+    Evaluate one expression tree over columns of numbers.
+
+    Args:
+        tree: A validated expression tree referencing the column names
+        columns: Column name -> list of Python numbers (length 1 or rows)
+        rows: Number of rows to produce
+        scalar: Fallback taking a row index and returning its exact result
+
+    Returns:
+        One result (number or exception instance) per row
+    """
+    float_columns, int_columns = {}, {}
+    for name, column in columns.items():
+        float_columns[name] = np.broadcast_to(
+            np.fromiter((_to_float(v) for v in column), dtype=np.float64, count=len(column)), (rows,)
+        )
+        int_columns[name] = np.broadcast_to(
+            np.fromiter((type(v) is int for v in column), dtype=bool, count=len(column)), (rows,)
+        )
+
+    with np.errstate(all="ignore"):
+        values, is_int, peak = _vectorize(tree)(float_columns, int_columns)
+        values = np.broadcast_to(values, (rows,))
+        is_int = np.broadcast_to(is_int, (rows,))
+        exact = np.broadcast_to(np.isfinite(values) & (peak < EXACT_LIMIT), (rows,))
+
+    results = []
+    for row, (value, row_is_int, row_exact) in enumerate(zip(values.tolist(), is_int.tolist(), exact.tolist())):
+        if not row_exact:
+            results.append(scalar(row))
+        elif row_is_int:
+            results.append(int(value))
+        else:
+            results.append(value)
+    return results
+
+
+def _scalar(compiled: calc_engine.CompiledExpression, values: Dict):
+    """Evaluate one row on the exact, cost-bounded calc_engine path."""
+    try:
+        return compiled.evaluate(values)
+    except (ExpressionError, ZeroDivisionError, OverflowError, TypeError, ValueError) as e:
+        # TypeError: e.g. (-8) ** 0.5 // 2 (complex operands)
+        return e
+
+
+def evaluate_expressions(expressions: Sequence[str]) -> List:
+    """
+    Evaluate a list of independent arithmetic expressions.
+
+    Args:
+        expressions: Mathematical expressions as strings
+
+    Returns:
+        One result per expression, in order: a number, or the exception
+        (ExpressionError, ZeroDivisionError, OverflowError, TypeError, ...)
+        that calculate() would have reported for it
+    """
+    if len(expressions) > MAX_BATCH:
+        raise ExpressionError(f"Batch too large (limit is {MAX_BATCH} expressions)")
+
+    results = [None] * len(expressions)
+    groups: Dict[str, Tuple[calc_engine.CompiledExpression, List[int], List[list]]] = {}
+    for index, expression in enumerate(expressions):
+        vector_shape = _vector_shape(expression)
+        if vector_shape is None:
+            # Let calc_engine report exactly what is wrong with this expression
+            results[index] = _scalar_expression(expression)
+            continue
+        shape, compiled_shape, numbers = vector_shape
+        if shape not in groups:
+            groups[shape] = (compiled_shape, [], [])
+        groups[shape][1].append(index)
+        groups[shape][2].append(numbers)
+
+    for compiled_shape, indices, number_rows in groups.values():
+        columns = dict(zip(compiled_shape.variables, (list(column) for column in zip(*number_rows))))
+        group_results = _evaluate_columns(
+            compiled_shape.tree,
+            columns,
+            len(indices),
+            lambda row: _scalar_expression(expressions[indices[row]]),
+        )
+        for index, result in zip(indices, group_results):
+            results[index] = result
+    return results
+
+
+def _vector_shape(expression: str) -> Optional[Tuple[str, calc_engine.CompiledExpression, list]]:
+    """(shape, compiled shape, numbers) of an expression, or None if it must take the scalar path."""
+    source = calc_engine.normalize(expression)
+    if not set(source) <= calc_engine.ALLOWED_CHARS or len(source) > calc_engine.MAX_LENGTH:
+        return None
+    if LEADING_ZERO_PATTERN.search(NUMBER_PATTERN.sub(_int_part, source)):
+        return None
+    shape, names, numbers = _shape(source)
+    try:
+        return shape, calc_engine.compile_expression(shape, variables=names), numbers
+    except ExpressionError:
+        return None
+
+
+def _int_part(match) -> str:
+    """Keep integer literals (for the leading-zero check) and blank out floats."""
+    token = match.group()
+    return "" if "." in token else f" {token}"
+
+
+def _scalar_expression(expression: str):
+    """Evaluate one literal expression on the scalar calc_engine path."""
+    try:
+        return _scalar(calc_engine.compile_expression(expression), {})
+    except ExpressionError as e:
+        return e
+
+
+def evaluate_template(template: str, columns: Dict[str, Sequence]) -> List:
+    """
+    Evaluate one expression template over columns of values.
+
+    Args:
+        template: An expression referencing the column names, e.g. "x * y + 1"
+        columns: Column name -> values; all columns must have the same length
+            (a single value is broadcast to every row)
+
+    Returns:
+        One result per row, as in evaluate_expressions()
+    """
+    names = tuple(sorted(columns))
+    compiled = calc_engine.compile_expression(template, variables=names)
+    lengths = {len(column) for column in columns.values() if len(column) != 1}
+    if len(lengths) > 1:
+        raise ExpressionError("All value columns must have the same length")
+    rows = lengths.pop() if lengths else 1
+    if rows > MAX_BATCH:
+        raise ExpressionError(f"Batch too large (limit is {MAX_BATCH} rows)")
+
+    def row_values(row):
+        return {name: column[row if len(column) != 1 else 0] for name, column in columns.items()}
+
+    return _evaluate_columns(
+        compiled.tree, columns, rows, lambda row: _scalar(compiled, row_values(row))
+    )
+
+
+def _to_float(value) -> float:
+    """Convert a number to float64, mapping integers beyond its range to infinity."""
+    try:
+        return float(value)
+    except OverflowError:
+        return float("inf")
+
+
+def _parse_number(text: str):
+    """Parse a template column value as an int or a float."""
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ExpressionError(f"Invalid value: {text!r}") from None
+
+
+def _format(result) -> str:
+    """Format one result the same way calculate() does."""
+    if isinstance(result, ZeroDivisionError):
+        return "Error: Division by zero"
+    if isinstance(result, OverflowError):
+        return "Error: Result too large"
+    if isinstance(result, Exception):
+        return f"Error: {str(result)}"
+    return f"Result: {result}"
+
+
+def calculate_batch(spec: str) -> str:
+    """
+    Evaluate many expressions in one call (the batch calculator tool).
+
+    Args:
+        spec: Either expressions separated by ';' or newlines
+            ("25 * 37; 100 / 4"), or a template followed by '|'-separated
+            value columns ("x * y | x = 1, 2, 3 | y = 4, 5, 6")
+
+    Returns:
+        One numbered result line per expression or row
+    """
+    try:
+        if "|" in spec:
+            template, *column_specs = spec.split("|")
+            columns = {}
+            for column_spec in column_specs:
+                name, sep, values = column_spec.partition("=")
+                name = name.strip()
+                if not sep or not name.isidentifier():
+                    raise ExpressionError(f"Invalid value column: {column_spec.strip()!r}")
+                columns[name] = [_parse_number(v) for v in values.split(",") if v.strip()]
+            results = evaluate_template(template, columns)
+            labels = [
+                ", ".join(f"{name}={column[row if len(column) != 1 else 0]}" for name, column in columns.items())
+                for row in range(len(results))
+            ]
+        else:
+            expressions = [e.strip() for e in spec.replace("\n", ";").split(";") if e.strip()]
+            if not expressions:
+                return "Error: No expressions given"
+            results = evaluate_expressions(expressions)
+            labels = expressions
+    except ExpressionError as e:
+        return f"Error: {str(e)}"
+
+    return "\n".join(
+        f"{i}. {label} -> {_format(result)}" for i, (label, result) in enumerate(zip(labels, results), 1)
+    )
@@ -0,0 +1,261 @@
+"""
+Streaming JSONL Batch Runner
+Streams requests from a JSONL file, fans them out to a worker pool and writes
+results as NDJSON as they complete. Memory stays flat regardless of input
+size: the input is read line by line, at most `2 x workers` requests are
+in flight at any time, and reading pauses while more than `max_ahead` lines
+are finished past one that is still running.
+
+Progress is checkpointed to `<output>.ckpt`, so a killed job resumes where
+it stopped. The checkpoint holds the byte offset of the first input line
+that is not finished yet (everything before it is done), the few lines
+already finished beyond it, and the output size at checkpoint time. On
+resume, only the output written after the checkpoint is re-read (all of it,
+if the job died before its first checkpoint), so no request is answered
+twice.
+
+Input lines are JSON objects with the query under "query" (or "input");
+an "id" field, if present, is copied to the result. Blank lines are skipped.
+
+With --adaptive, the number of LLM calls in flight is tuned at runtime by an
+AdaptiveLimiter (AIMD) between 1 and --workers.
+
+Usage:
+    python examples/batch_runner.py requests.jsonl results.ndjson --workers 8
+    python examples/batch_runner.py requests.jsonl results.ndjson --workers 32 --adaptive
+    python examples/batch_runner.py requests.jsonl results.ndjson --mock-llm  # offline
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+# Keys looked up (in order) for the query text of a request
+QUERY_FIELDS = ("query", "input")
+
+
+def iter_lines(path: str, offset: int, line_number: int) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Stream (line number, end offset, raw line) from a byte offset on.
+
+    Args:
+        path: The JSONL input file
+        offset: Byte offset to start reading from
+        line_number: Line number of the line starting at offset
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            yield line_number, offset, raw
+            line_number += 1
+
+
+class Checkpoint:
+    """Tracks which input lines are done and persists it atomically."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.line = 0  # every line before this one is done
+        self.offset = 0  # input byte offset where self.line starts
+        self.output_offset = 0  # output size when the checkpoint was written
+        self.ahead: Set[int] = set()  # done lines after self.line
+        self._ends: Dict[int, int] = {}  # line -> input offset after it
+
+    def load(self) -> bool:
+        """Load a saved checkpoint; returns False if there is none."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            state = json.load(f)
+        self.line = state["line"]
+        self.offset = state["offset"]
+        self.output_offset = state["output_offset"]
+        self.ahead = set(state["ahead"])
+        return True
+
+    def save(self, output_offset: int) -> None:
+        """Write the checkpoint (atomically, via a temporary file)."""
+        self.output_offset = output_offset
+        state = {
+            "line": self.line,
+            "offset": self.offset,
+            "output_offset": output_offset,
+            "ahead": sorted(self.ahead),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def started(self, line: int, end_offset: int) -> None:
+        """Remember where a line ends, so the watermark can move past it."""
+        self._ends[line] = end_offset
+
+    def finished(self, line: int) -> None:
+        """Mark a line done and advance the contiguous watermark."""
+        self.ahead.add(line)
+        while self.line in self.ahead and self.line in self._ends:
+            self.ahead.discard(self.line)
+            self.offset = self._ends.pop(self.line)
+            self.line += 1
+
+
+def recover_output(output_path: str, checkpoint: Checkpoint) -> None:
+    """
+    Reconcile the output with the checkpoint after a crash.
+
+    Results written after the checkpoint are marked done (so they are not
+    redone) and a partially written last line is truncated.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(checkpoint.output_offset)
+        position = checkpoint.output_offset
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                f.truncate(position)
+                break
+            checkpoint.ahead.add(json.loads(raw)["line"])
+            position += len(raw)
+
+
+def process_line(run: Callable[[str], str], line: int, raw: bytes) -> Dict:
+    """Answer one request line and build its result record."""
+    record = {"line": line}
+    start = time.perf_counter()
+    try:
+        request = json.loads(raw)
+        if "id" in request:
+            record["id"] = request["id"]
+        query = next((request[key] for key in QUERY_FIELDS if key in request), None)
+        if not isinstance(query, str):
+            raise ValueError(f"Request has no query (expected one of: {', '.join(QUERY_FIELDS)})")
+        record["query"] = query
+        record["answer"] = run(query)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_batch(
+    run: Callable[[str], str],
+    input_path: str,
+    output_path: str,
+    workers: int = 8,
+    checkpoint_every: int = 100,
+    progress: Optional[Callable[[int, int], None]] = None,
+    max_ahead: int = 10_000,
+) -> int:
+    """
+    Process a JSONL file of requests, resuming from a checkpoint if present.
+
+    Args:
+        run: Answers one query (e.g. agent.run)
+        input_path: JSONL requests
+        output_path: NDJSON results (appended to)
+        workers: Worker threads
+        checkpoint_every: Completed requests between checkpoints
+        progress: Optional callback(completed, failed) after every request
+        max_ahead: Most lines read past the oldest unfinished one (bounds
+            the checkpoint size while a slow request holds it back)
+
+    Returns:
+        Number of requests processed in this run
+    """
+    checkpoint = Checkpoint(f"{output_path}.ckpt")
+    # Without a checkpoint, everything already in the output is recovered
+    checkpoint.load()
+    recover_output(output_path, checkpoint)
+
+    window = max(1, workers * 2)
+    completed = failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(output_path, "ab") as out:
+        in_flight = {}
+
+        def collect(done) -> None:
+            nonlocal completed, failed
+            for future in done:
+                line = in_flight.pop(future)
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                checkpoint.finished(line)
+                completed += 1
+                failed += "error" in record
+                if progress is not None:
+                    progress(completed, failed)
+                if completed % checkpoint_every == 0:
+                    out.flush()
+                    checkpoint.save(out.tell())
+
+        for line, end_offset, raw in iter_lines(input_path, checkpoint.offset, checkpoint.line):
+            while in_flight and (len(in_flight) >= window or line - checkpoint.line >= max_ahead):
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            checkpoint.started(line, end_offset)
+            if line in checkpoint.ahead or not raw.strip():
+                checkpoint.finished(line)
+                continue
+            in_flight[pool.submit(process_line, run, line, raw)] = line
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+        out.flush()
+        checkpoint.save(out.tell())
+    return completed
+
+
+def main():
+    # Imported here so run_batch() can be reused without LangChain installed
+    from adaptive_limiter import AdaptiveLimitedLLM, AdaptiveLimiter
+    from fast_path import FastPathRouter
+    from simple_calculator_agent import build_agent, build_llm, calculate
+
+    parser = argparse.ArgumentParser(description="Streaming JSONL batch runner for the calculator agent")
+    parser.add_argument("input", help="JSONL file of requests")
+    parser.add_argument("output", help="NDJSON file results are appended to")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Requests between checkpoints")
+    parser.add_argument("--mock-llm", action="store_true", help="Run offline against the scripted mock LLM")
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every query through the agent")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt LLM calls in flight (AIMD) up to --workers")
+    args = parser.parse_args()
+
+    if not args.mock_llm and not os.getenv("OPENAI_API_KEY"):
+        print("❌ Error: OPENAI_API_KEY not found (or run offline with --mock-llm)")
+        return
+
+    llm = build_llm(mock=args.mock_llm)
+    # Each LLM call takes a limiter slot, so its latency is judged per call, not per agent run
+    limiter = AdaptiveLimiter(initial=min(4, args.workers), max_limit=args.workers) if args.adaptive else None
+    if limiter is not None:
+        llm = AdaptiveLimitedLLM(inner=llm, limiter=limiter)
+    agent = build_agent(llm, verbose=False)
+    router = FastPathRouter(agent.run, calculate, enabled=not args.no_fast_path)
+
+    start = time.perf_counter()
+
+    def progress(completed: int, failed: int) -> None:
+        if completed % 1000 == 0:
+            rate = completed / (time.perf_counter() - start)
+            limit = f", limit {limiter.limit}" if limiter is not None else ""
+            print(f"  {completed} done ({failed} failed), {rate:.1f} req/s{limit}", flush=True)
+
+    print(f"📦 Batch: {args.input} -> {args.output} ({args.workers} workers)")
+    completed = run_batch(router.run, args.input, args.output, args.workers, args.checkpoint_every, progress)
+    print(f"✅ {completed} requests in {time.perf_counter() - start:.1f}s")
+    print(router.summary())
+    if limiter is not None:
+        print(f"🎚️  Adaptive concurrency: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Calculator Microbenchmark
+Compares the original whitelist + eval() calculator against the AST-compiled
+engine in calc_engine.py, on a cold cache (every call parses) and a warm cache
+(repeated expressions, as produced by agent loops).
+
+Usage:
+    python examples/bench_calculator.py
+    python examples/bench_calculator.py --repeat 20000
+"""
+
+import argparse
+import timeit
+
+import calc_engine
+
+EXPRESSIONS = [
+    "25 * 37",
+    "100 / 4",
+    "15 + 23 - 8",
+    "2 ** 10",
+    "(123 + 456) * 789 / 3",
+    "  25*37  ",  # near-duplicate of the first expression
+]
+
+
+def eval_calculate(expression: str):
+    """The original calculator path: per-character scan followed by eval()."""
+    allowed_chars = set('0123456789+-*/(). ')
+    if not all(c in allowed_chars for c in expression):
+        raise ValueError("Invalid characters in expression")
+    return eval(expression)
+
+
+def engine_cold(expression: str):
+    """The compiled engine with the cache dropped before every call."""
+    calc_engine.cache_clear()
+    return calc_engine.evaluate(expression)
+
+
+def engine_warm(expression: str):
+    """The compiled engine with the cache already populated."""
+    return calc_engine.evaluate(expression)
+
+
+def bench(func, repeat: int) -> float:
+    """Return the mean time in microseconds per expression for func."""
+    def run():
+        for expression in EXPRESSIONS:
+            func(expression)
+
+    run()  # warm-up (also fills the cache for engine_warm)
+    seconds = min(timeit.repeat(run, number=repeat, repeat=3))
+    return seconds / (repeat * len(EXPRESSIONS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5000, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    print("🧮 Calculator Microbenchmark")
+    print("=" * 50)
+    results = {
+        "eval() path": bench(eval_calculate, args.repeat),
+        "engine (cold cache)": bench(engine_cold, args.repeat),
+        "engine (warm cache)": bench(engine_warm, args.repeat),
+    }
+    baseline = results["eval() path"]
+    for name, micros in results.items():
+        print(f"{name:<22} {micros:8.2f} µs/expr  ({baseline / micros:5.1f}x vs eval)")
+    print(f"\nCache: {calc_engine.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Agent Loop Benchmark
+Runs the example agents many times against the offline ScriptedLLM and
+reports where the wall time of each query goes:
+
+    llm      - waiting for the LLM (the mock's configured latency)
+    prompt   - building the ReAct prompt
+    parse    - parsing the LLM output into an action / final answer
+    tool     - running tools
+    memory   - saving conversation memory
+    other    - everything else (agent executor bookkeeping, callbacks)
+
+with p50/p95/p99 per phase across all runs. Results can be saved as a
+baseline and later runs compared against it (exit code 1 on regression).
+
+Requirements:
+    pip install langchain
+
+Usage:
+    python examples/benchmark_agent.py --runs 50
+    python examples/benchmark_agent.py --scenario research --latency 0.05
+    python examples/benchmark_agent.py --save-baseline bench_baseline.json
+    python examples/benchmark_agent.py --baseline bench_baseline.json --threshold 10
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from langchain.agents import AgentType, initialize_agent
+from langchain.memory import ConversationBufferMemory
+from langchain.tools import Tool
+
+from mock_llm import ScriptedLLM
+from simple_calculator_agent import TEST_QUERIES, build_agent
+
+PHASES = ("llm", "prompt", "parse", "tool", "memory", "other")
+PERCENTILES = (50, 95, 99)
+
+RESEARCH_SCRIPT = {
+    "What is machine learning?": [
+        " I should search for a definition.\nAction: Search\nAction Input: machine learning definition",
+        " I now know the final answer.\nFinal Answer: Machine learning is a field of AI where systems learn patterns from data.",
+    ],
+    "What are AI agents?": [
+        " I should search for this.\nAction: Search\nAction Input: AI agents",
+        " I now know the final answer.\nFinal Answer: AI agents are systems that perceive, decide and act using tools.",
+    ],
+}
+
+
+class PhaseTimer:
+    """Accumulates time spent in each phase of one agent run."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.totals = {phase: 0.0 for phase in PHASES}
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[phase] += time.perf_counter() - start
+
+    def wrap(self, obj, name: str, phase: str) -> None:
+        """Replace obj.name with a version that times itself under phase."""
+        original = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            with self.measure(phase):
+                return original(*args, **kwargs)
+
+        # Agents and tools are pydantic models; bypass field validation
+        object.__setattr__(obj, name, timed)
+
+
+def instrument(agent, timer: PhaseTimer) -> None:
+    """
+    Instrument an AgentExecutor so every phase reports to the timer.
+
+    Args:
+        agent: The AgentExecutor returned by initialize_agent()
+        timer: Where phase times are accumulated
+    """
+    llm_chain = agent.agent.llm_chain
+    timer.wrap(llm_chain, "prep_prompts", "prompt")
+    timer.wrap(llm_chain.llm, "generate_prompt", "llm")
+    timer.wrap(agent.agent.output_parser, "parse", "parse")
+    for tool in agent.tools:
+        timer.wrap(tool, "func", "tool")
+    if agent.memory is not None:
+        timer.wrap(agent.memory, "save_context", "memory")
+
+
+def search_stub(query: str) -> str:
+    """Offline stand-in for the Examples page web search tool."""
+    return f"Top result for '{query}': a short encyclopedia-style summary of the topic."
+
+
+def build_scenario(name: str, latency: float, tokens_per_second: float) -> Tuple[object, List[str]]:
+    """
+    Build the agent and queries for a benchmark scenario.
+
+    Args:
+        name: "calculator", "calculator-memory" or "research"
+        latency: Mock LLM seconds before the first token
+        tokens_per_second: Mock LLM generation speed (0 = instant)
+
+    Returns:
+        (agent, queries)
+    """
+    if name == "calculator":
+        llm = ScriptedLLM(latency=latency, tokens_per_second=tokens_per_second)
+        return build_agent(llm, verbose=False), TEST_QUERIES
+
+    if name == "calculator-memory":
+        llm = ScriptedLLM(latency=latency, tokens_per_second=tokens_per_second)
+        agent = build_agent(llm, verbose=False)
+        agent.memory = ConversationBufferMemory(memory_key="chat_history")
+        return agent, TEST_QUERIES
+
+    if name == "research":
+        llm = ScriptedLLM(script=RESEARCH_SCRIPT, latency=latency, tokens_per_second=tokens_per_second)
+        search_tool = Tool(
+            name="Search",
+            func=search_stub,
+            description="Search the web for current information."
+        )
+        agent = initialize_agent(
+            tools=[search_tool],
+            llm=llm,
+            agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+            verbose=False
+        )
+        return agent, list(RESEARCH_SCRIPT)
+
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+SCENARIOS = ("calculator", "calculator-memory", "research")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_benchmark(agent, queries: List[str], runs: int, warmup: int = 1) -> Dict[str, List[float]]:
+    """
+    Run every query `runs` times and collect per-phase samples.
+
+    Args:
+        agent: The agent to benchmark
+        queries: Queries to run each round
+        runs: Number of measured rounds
+        warmup: Unmeasured rounds run first
+
+    Returns:
+        Phase name (plus "total") -> one sample in seconds per query run
+    """
+    timer = PhaseTimer()
+    instrument(agent, timer)
+    samples: Dict[str, List[float]] = {phase: [] for phase in PHASES + ("total",)}
+
+    for round_number in range(warmup + runs):
+        for query in queries:
+            timer.reset()
+            start = time.perf_counter()
+            agent.run(query)
+            total = time.perf_counter() - start
+            if round_number < warmup:
+                continue
+            timer.totals["other"] = max(0.0, total - sum(timer.totals.values()))
+            for phase, seconds in timer.totals.items():
+                samples[phase].append(seconds)
+            samples["total"].append(total)
+    return samples
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Reduce samples to p50/p95/p99 (in milliseconds) per phase."""
+    return {
+        phase: {f"p{p}": percentile(values, p) * 1e3 for p in PERCENTILES}
+        for phase, values in samples.items()
+        if values
+    }
+
+
+def print_report(summary: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None) -> None:
+    """Print the per-phase table, with deltas against a baseline if given."""
+    header = f"{'phase':<8}" + "".join(f"{f'p{p} (ms)':>14}" for p in PERCENTILES)
+    if baseline:
+        header += f"{'p50 vs base':>14}"
+    print(header)
+    print("-" * len(header))
+    for phase in PHASES + ("total",):
+        if phase not in summary:
+            continue
+        row = f"{phase:<8}" + "".join(f"{summary[phase][f'p{p}']:>14.3f}" for p in PERCENTILES)
+        if baseline and phase in baseline:
+            row += f"{_delta(summary[phase]['p50'], baseline[phase]['p50']):>14}"
+        print(row)
+
+
+def _delta(current: float, base: float) -> str:
+    if base <= 0:
+        return "n/a"
+    return f"{(current - base) / base * 100:+.1f}%"
+
+
+def regressions(summary, baseline, threshold: float, min_ms: float = 0.05) -> List[str]:
+    """
+    List phases whose p50 got slower than the baseline by more than threshold %.
+
+    Phases faster than min_ms in the baseline are ignored (pure noise).
+    """
+    slower = []
+    for phase, stats in summary.items():
+        base = baseline.get(phase)
+        if not base or base["p50"] < min_ms:
+            continue
+        change = (stats["p50"] - base["p50"]) / base["p50"] * 100
+        if change > threshold:
+            slower.append(f"{phase}: p50 {base['p50']:.3f} -> {stats['p50']:.3f} ms ({change:+.1f}%)")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent loop benchmark with per-phase latency breakdown")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="calculator")
+    parser.add_argument("--runs", type=int, default=20, help="Measured rounds over all queries")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured rounds run first")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock LLM generation speed")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p50 regression in percent")
+    args = parser.parse_args()
+
+    agent, queries = build_scenario(args.scenario, args.latency, args.tokens_per_second)
+    print(f"⏱️  Agent Loop Benchmark: {args.scenario} ({args.runs} runs x {len(queries)} queries)")
+    print("=" * 50)
+
+    summary = summarize(run_benchmark(agent, queries, args.runs, args.warmup))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["phases"]
+    print_report(summary, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"scenario": args.scenario, "runs": args.runs, "phases": summary}, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save_baseline}")
+
+    if baseline:
+        slower = regressions(summary, baseline, args.threshold)
+        if slower:
+            print(f"\n❌ Regressions over {args.threshold}%:")
+            for line in slower:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n✅ No phase regressed by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Calculator Expression Engine
+Parses arithmetic expressions into a restricted AST once, compiles them into
+small Python closures and keeps the compiled form in a bounded LRU cache, so
+repeated expressions coming out of an agent loop skip parsing entirely.
+
+Evaluation is cost-bounded: before every operation the engine estimates the
+size of the result and the work needed to produce it, and refuses inputs such
+as 9**9**9**9 instead of pinning a CPU core for minutes.
+
+Usage:
+    from calc_engine import evaluate
+    evaluate("25 * 37")  # -> 925
+"""
+
+import ast
+import math
+import operator
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+# Maximum number of compiled expressions kept in memory
+CACHE_SIZE = 1024
+
+# Per-call evaluation budget
+MAX_LENGTH = 2000  # characters in the (normalized) expression
+MAX_NODES = 500  # AST nodes in the parsed expression
+MAX_DIGITS = 1000  # decimal digits of any intermediate integer
+MAX_COST = 5_000_000  # estimated digit operations per call
+
+LOG10_2 = math.log10(2)
+
+# Integers up to this many bits are cheap enough for +, -, * and / to skip
+# the per-operation estimate; ** is always checked
+SMALL_INT_BITS = 64
+
+# Same character whitelist the original eval()-based calculator used
+ALLOWED_CHARS = frozenset("0123456789+-*/(). ")
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Characters that form a different token when written together ("1 2" -> "12", "* *" -> "**")
+_WORD_CHARS = re.compile(r"[\w.]")
+_DOUBLED_OPERATORS = frozenset("*/")
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is not a supported arithmetic expression."""
+
+
+class ExpressionTooExpensive(ExpressionError):
+    """Raised when evaluating an expression would exceed the digit or cost budget."""
+
+
+class Budget:
+    """Digit and cost budget shared by every operation of one evaluation."""
+
+    __slots__ = ("max_digits", "remaining")
+
+    def __init__(self, max_digits: int = MAX_DIGITS, max_cost: int = MAX_COST):
+        self.max_digits = max_digits
+        self.remaining = max_cost
+
+    def charge(self, result_digits: float, cost: float) -> None:
+        """Account for one operation before it runs."""
+        if result_digits > self.max_digits:
+            raise ExpressionTooExpensive(
+                f"Expression too expensive to evaluate "
+                f"(result would have ~{result_digits:.3g} digits, limit is {self.max_digits})"
+            )
+        self.remaining -= cost
+        if self.remaining < 0:
+            raise ExpressionTooExpensive("Expression too expensive to evaluate (CPU budget exceeded)")
+
+
+def digits(value) -> float:
+    """Estimate the number of decimal digits of a number (floats count as one)."""
+    if type(value) is int:
+        return value.bit_length() * LOG10_2 + 1
+    return 1
+
+
+def _estimate(op, left, right) -> Tuple[float, float]:
+    """Estimate (result digits, digit operations) of a binary operation."""
+    left_digits, right_digits = digits(left), digits(right)
+    if op is operator.pow:
+        if type(left) is not int or type(right) is not int or right < 0 or abs(left) <= 1:
+            # Float arithmetic is constant time (it overflows instead of growing)
+            return 1, 1
+        # An upper bound: left**right has at most floor(right * log10|left|) + 1 digits
+        result_digits = math.floor(right * math.log10(abs(left))) + 1
+        return result_digits, result_digits * math.log2(right + 1)
+    if op is operator.mul:
+        return left_digits + right_digits, left_digits * right_digits
+    if op in (operator.truediv, operator.floordiv):
+        return left_digits, left_digits * right_digits
+    return max(left_digits, right_digits) + 1, max(left_digits, right_digits)
+
+
+class CompiledExpression:
+    """
+    A parsed and compiled arithmetic expression.
+
+    Calling the instance evaluates the expression under the default budget.
+    Variable values (only used by expression templates) are passed as keyword
+    arguments.
+    """
+
+    __slots__ = ("source", "variables", "tree", "_evaluate")
+
+    def __init__(self, source: str, variables: Tuple[str, ...], tree: ast.expr):
+        self.source = source
+        self.variables = variables
+        self.tree = tree
+        self._evaluate = _compile_node(tree, variables)
+
+    def __call__(self, **values):
+        return self.evaluate(values)
+
+    def evaluate(self, values: Optional[Dict] = None, budget: Optional[Budget] = None):
+        """
+        Evaluate the expression.
+
+        Args:
+            values: Variable values for template expressions
+            budget: Digit and cost budget (defaults to MAX_DIGITS / MAX_COST)
+
+        Returns:
+            The numeric result
+
+        Raises:
+            ExpressionTooExpensive: If the budget would be exceeded
+        """
+        return self._evaluate(values or {}, budget or Budget())
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
+
+
+def normalize(expression: str) -> str:
+    """
+    Normalize an expression so near-duplicates share one cache entry.
+
+    Args:
+        expression: A mathematical expression as a string
+
+    Returns:
+        The expression without whitespace, except single spaces where
+        removing it would join two tokens ("1 2", "2 * * 3"), so the
+        normalized form always means the same as the original
+    """
+    return WHITESPACE_PATTERN.sub(_whitespace_replacement, expression.strip())
+
+
+def _whitespace_replacement(match) -> str:
+    before, after = match.string[match.start() - 1], match.string[match.end()]
+    if _WORD_CHARS.match(before) and _WORD_CHARS.match(after):
+        return " "
+    if before == after and before in _DOUBLED_OPERATORS:
+        return " "
+    return ""
+
+
+def _compile_node(node: ast.expr, variables: Tuple[str, ...]) -> Callable[[Dict, Budget], object]:
+    """Recursively turn a restricted AST node into a closure taking the variable values and budget."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return lambda values, budget: value
+
+    if isinstance(node, ast.Name) and node.id in variables:
+        name = node.id
+        return lambda values, budget: values[name]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = BINARY_OPERATORS[type(node.op)]
+        left = _compile_node(node.left, variables)
+        right = _compile_node(node.right, variables)
+        always_check = op is operator.pow
+
+        def binary(values, budget):
+            a, b = left(values, budget), right(values, budget)
+            if (
+                always_check
+                or (type(a) is int and a.bit_length() > SMALL_INT_BITS)
+                or (type(b) is int and b.bit_length() > SMALL_INT_BITS)
+            ):
+                budget.charge(*_estimate(op, a, b))
+            return op(a, b)
+
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, variables)
+        return lambda values, budget: op(operand(values, budget))
+
+    raise ExpressionError(f"Unsupported expression element: {type(node).__name__}")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_normalized(source: str, variables: Tuple[str, ...]) -> CompiledExpression:
+    if not source:
+        raise ExpressionError("Empty expression")
+    if not variables and not set(source) <= ALLOWED_CHARS:
+        raise ExpressionError("Invalid characters in expression")
+    if len(source) > MAX_LENGTH:
+        raise ExpressionTooExpensive(f"Expression too long (limit is {MAX_LENGTH} characters)")
+    try:
+        tree = ast.parse(source, mode="eval").body
+    except SyntaxError:
+        raise ExpressionError("Invalid expression syntax") from None
+    except (RecursionError, MemoryError):
+        raise ExpressionTooExpensive("Expression nested too deeply") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionTooExpensive(f"Expression too large (limit is {MAX_NODES} operations)")
+    return CompiledExpression(source, variables, tree)
+
+
+def compile_expression(expression: str, variables: Tuple[str, ...] = ()) -> CompiledExpression:
+    """
+    Parse and compile an expression, reusing a cached result when possible.
+
+    Args:
+        expression: A mathematical expression as a string
+        variables: Names the expression may reference (for templates)
+
+    Returns:
+        The compiled expression
+
+    Raises:
+        ExpressionError: If the expression is empty, malformed or uses
+            anything other than numbers and arithmetic operators
+        ExpressionTooExpensive: If the expression is too long or too large
+    """
+    return _compile_normalized(normalize(expression), tuple(variables))
+
+
+def evaluate(expression: str, max_digits: int = MAX_DIGITS, max_cost: int = MAX_COST):
+    """
+    Evaluate an arithmetic expression through the compiled-expression cache.
+
+    Args:
+        expression: A mathematical expression as a string
+        max_digits: Largest number of digits any intermediate integer may have
+        max_cost: Estimated digit operations allowed for the whole expression
+
+    Returns:
+        The numeric result
+
+    Raises:
+        ExpressionError: If the expression is not supported
+        ExpressionTooExpensive: If evaluating it would exceed the budget
+        ZeroDivisionError: If the expression divides by zero
+        OverflowError: If a floating-point result is out of range
+    """
+    return compile_expression(expression).evaluate(budget=Budget(max_digits, max_cost))
+
+
+def cache_info():
+    """Return hit/miss statistics of the compiled-expression cache."""
+    return _compile_normalized.cache_info()
+
+
+def cache_clear() -> None:
+    """Drop every cached compiled expression."""
+    _compile_normalized.cache_clear()
@@ -0,0 +1,263 @@
+"""
+Record/Replay Cassettes for Agents
+Records every LLM request/response and every tool invocation of an agent run
+to a compact on-disk cassette, and replays it later bit-for-bit with no
+network and no sleeping - at CPU speed.
+
+A cassette is an append-only file with one "<hash>\\t<json>" line per call.
+The hash covers only the request (prompt + stop sequences, or tool name +
+input), so replay does not depend on call order and works the same for
+concurrent runs; repeats of an identical request all get the same recorded
+response (the latest one, if it was recorded more than once). Opening a
+cassette only reads the hashes and remembers each line's byte offset;
+payloads are read on demand, so lookups stay O(1) however large the corpus
+grows. A last line cut short by a crash is ignored (and dropped before
+anything new is appended).
+
+The cassette also records which LLM it was made with (its type and
+identifying parameters, e.g. model and temperature). Recording or replaying
+through a different LLM raises CassetteMismatchError instead of serving
+another model's answers; replaying with no LLM at all serves the recording.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    cassette = Cassette("cassettes/calculator.cassette", mode="record")
+    llm = CassetteLLM(inner=OpenAI(temperature=0), cassette=cassette)
+    tools = [wrap_tool(tool, cassette) for tool in tools]
+
+    # Later, offline:
+    cassette = Cassette("cassettes/calculator.cassette", mode="replay")
+    llm = CassetteLLM(cassette=cassette)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain.llms.base import LLM
+from langchain.tools import Tool
+
+from streaming import forward_tokens
+
+MODES = ("record", "replay", "auto")
+
+_MISSING = object()
+
+# Key of the line recording which LLM made the cassette
+LLM_KEY = "#llm"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class CassetteMismatchError(ValueError):
+    """Raised when a cassette is used with a different LLM from the one it was recorded with."""
+
+
+class Cassette:
+    """
+    An on-disk store of recorded calls, indexed by request hash.
+
+    Modes:
+        record: always call through and append the result
+        replay: only serve recorded results (raise CassetteMissError otherwise)
+        auto: serve recorded results, call through and record on a miss
+    """
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.llm: Optional[Dict[str, Any]] = None
+        self._offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == "replay":
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No cassette to replay at {path}")
+            self._load_index()
+            self._reader = open(path, "rb")
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            self._load_index()
+        self._reader = open(path, "ab+")
+
+    def _load_index(self) -> None:
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn by a crash while it was being written
+                key, sep, record = line.partition(b"\t")
+                if key.decode("ascii") == LLM_KEY:
+                    self.llm = json.loads(record)
+                elif sep:
+                    self._offsets[key.decode("ascii")] = offset
+                offset += len(line)
+        if self.mode != "replay" and os.path.getsize(self.path) > offset:
+            # New records must not be appended to the torn line
+            os.truncate(self.path, offset)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        """Close the cassette file."""
+        self._reader.close()
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def key(self, kind: str, request: Dict[str, Any]) -> str:
+        """
+        Hash a request.
+
+        Args:
+            kind: "llm" or "tool"
+            request: JSON-serializable description of the request
+
+        Returns:
+            The hex key under which the response is stored
+        """
+        return hashlib.sha256(
+            json.dumps([kind, request], sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the recorded response for a key, or default (a recorded None is returned as None)."""
+        if self.mode == "record":
+            return default
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                self.misses += 1
+                return default
+            self._reader.seek(offset)
+            line = self._reader.readline()
+            self.hits += 1
+        return json.loads(line.partition(b"\t")[2])["response"]
+
+    def _append(self, line: bytes) -> int:
+        # Caller holds the lock; returns the offset the line was written at
+        self._reader.seek(0, os.SEEK_END)
+        offset = self._reader.tell()
+        self._reader.write(line)
+        self._reader.flush()
+        return offset
+
+    def put(self, key: str, request: Dict[str, Any], response: Any) -> None:
+        """Append a recorded call to the cassette."""
+        record = json.dumps({"request": request, "response": response}, separators=(",", ":"))
+        line = f"{key}\t{record}\n".encode("utf-8")
+        with self._lock:
+            self._offsets[key] = self._append(line)
+
+    def check_llm(self, llm: Dict[str, Any]) -> None:
+        """
+        Make sure the cassette belongs to an LLM, recording it on first use.
+
+        Args:
+            llm: JSON-serializable identity of the LLM (type and identifying parameters)
+
+        Raises:
+            CassetteMismatchError: The cassette was recorded with a different LLM
+        """
+        llm = json.loads(json.dumps(llm, sort_keys=True, default=str))
+        with self._lock:
+            if self.llm is None:
+                if self.mode == "replay":
+                    return  # nothing recorded yet, so every request misses anyway
+                self._append(f"{LLM_KEY}\t{json.dumps(llm, separators=(',', ':'))}\n".encode("utf-8"))
+                self.llm = llm
+            elif self.llm != llm:
+                raise CassetteMismatchError(
+                    f"Cassette {self.path} was recorded with {json.dumps(self.llm)}, not {json.dumps(llm)}"
+                )
+
+    def call(self, kind: str, request: Dict[str, Any], func):
+        """
+        Serve a call from the cassette or make it and record the response.
+
+        Args:
+            kind: "llm" or "tool"
+            request: JSON-serializable description of the request
+            func: Zero-argument function making the real call
+
+        Returns:
+            The recorded or freshly made response
+        """
+        key = self.key(kind, request)
+        recorded = self.get(key, _MISSING)
+        if recorded is not _MISSING:
+            return recorded
+        if self.mode == "replay":
+            raise CassetteMissError(f"No recorded {kind} call for {json.dumps(request)[:200]}")
+        response = func()
+        self.put(key, request, response)
+        return response
+
+
+class CassetteLLM(LLM):
+    """LLM wrapper that records to / replays from a Cassette."""
+
+    cassette: Any
+    inner: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        if self.inner is None:
+            return {"cassette": self.cassette.path}
+        return self.inner._identifying_params
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if self.inner is not None:
+            self.cassette.check_llm({"type": self.inner._llm_type, "params": self.inner._identifying_params})
+
+        def call_inner():
+            if self.inner is None:
+                raise CassetteMissError("Cassette has no recording for this prompt and no LLM to call")
+            return self.inner(prompt, stop=stop, callbacks=forward_tokens(run_manager))
+
+        return self.cassette.call("llm", {"prompt": prompt, "stop": stop}, call_inner)
+
+
+def wrap_tool(tool: Tool, cassette: Cassette) -> Tool:
+    """
+    Return a copy of a tool whose invocations go through the cassette.
+
+    Args:
+        tool: The tool to wrap
+        cassette: Where to record to / replay from
+
+    Returns:
+        A Tool with the same name and description
+    """
+    def func(tool_input: str) -> str:
+        return cassette.call(
+            "tool", {"name": tool.name, "input": tool_input}, lambda: tool.run(tool_input)
+        )
+
+    return Tool(name=tool.name, func=func, description=tool.description)
@@ -0,0 +1,90 @@
+"""
+Concurrent Query Runner
+Runs many agent queries at once with asyncio under a concurrency cap, so the
+total time is bounded by the slowest LLM round-trips instead of their sum.
+
+Results come back in the order of the input queries, and every query is
+isolated: an exception in one is recorded in its result and never cancels
+the others.
+
+Usage:
+    results = asyncio.run(run_queries(agent.arun, queries, max_concurrency=8))
+    for result in results:
+        print(result.query, result.answer or result.error)
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+
+class QueryResult(NamedTuple):
+    """Outcome of one query."""
+
+    query: str
+    answer: Optional[str]
+    error: Optional[BaseException]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_queries(
+    run: Callable,
+    queries: Sequence[str],
+    max_concurrency: int = 4,
+) -> List[QueryResult]:
+    """
+    Run queries concurrently, at most max_concurrency at a time.
+
+    Args:
+        run: Answers one query - either a coroutine function (agent.arun)
+            or a blocking function (agent.run), which is run on a thread pool
+            sized to the concurrency cap
+        queries: The queries to run
+        max_concurrency: Maximum number of queries in flight
+
+    Returns:
+        One QueryResult per query, in input order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    is_async = inspect.iscoroutinefunction(run)
+    executor = None if is_async else ThreadPoolExecutor(max_workers=max_concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def call(query: str) -> str:
+        if is_async:
+            return await run(query)
+        return await loop.run_in_executor(executor, run, query)
+
+    async def one(query: str) -> QueryResult:
+        async with semaphore:
+            start = time.perf_counter()
+            answer, error = None, None
+            try:
+                answer = await call(query)
+            except Exception as e:
+                error = e
+            return QueryResult(query, answer, error, time.perf_counter() - start)
+
+    try:
+        return await asyncio.gather(*(one(query) for query in queries))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def run_queries_sync(
+    run: Callable,
+    queries: Sequence[str],
+    max_concurrency: int = 4,
+) -> List[QueryResult]:
+    """Blocking wrapper around run_queries() for scripts without an event loop."""
+    return asyncio.run(run_queries(run, queries, max_concurrency))
@@ -0,0 +1,206 @@
+"""
+Parallel PDF and DOCX Text Extraction
+Extracts text from PDFs (page by page, with pypdf) and DOCX files
+(paragraph by paragraph, with python-docx) in a process pool, so throughput
+scales with CPU cores. Results come back in input order, ready to be
+streamed into the chunker, and only a bounded window of files is in flight
+at a time.
+
+Every file has a timeout. Inside the worker, a SIGALRM interrupts the
+extraction; if a worker is stuck where signals cannot reach it (e.g. deep
+in C code), the parent gives up after a grace period, restarts the pool and
+re-queues the other files that were in flight. A failing or pathological
+file only produces an error for that file.
+
+Requirements:
+    pip install pypdf python-docx
+
+Usage:
+    for document in extract_documents(["report.pdf", "notes.docx"], timeout=60):
+        if document.ok:
+            chunks = splitter.split_pieces(document_pieces(document))
+        else:
+            print(document.path, document.error)
+"""
+
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+# Pages and paragraphs are joined like paragraphs of a text file
+PIECE_SEPARATOR = "\n\n"
+
+
+class ExtractionTimeout(TimeoutError):
+    """Raised in a worker when a file takes longer than its timeout."""
+
+
+class ExtractedDocument(NamedTuple):
+    """Text of one file, or why there is none."""
+
+    path: str
+    pieces: List[str]  # pages (PDF) or paragraphs (DOCX)
+    error: Optional[str]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def extract_pdf(path: str) -> List[str]:
+    """Text of each page of a PDF."""
+    from pypdf import PdfReader
+
+    return [page.extract_text() or "" for page in PdfReader(path).pages]
+
+
+def extract_docx(path: str) -> List[str]:
+    """Text of each paragraph of a DOCX file."""
+    import docx
+
+    return [paragraph.text for paragraph in docx.Document(path).paragraphs]
+
+
+EXTRACTORS: Dict[str, Callable[[str], List[str]]] = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+}
+
+
+def can_extract(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in EXTRACTORS
+
+
+def document_pieces(document: ExtractedDocument) -> Iterator[str]:
+    """The document's text as pieces for StreamingSplitter.split_pieces (stripped, non-empty, separated)."""
+    first = True
+    for piece in document.pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if not first:
+            yield PIECE_SEPARATOR
+        yield piece
+        first = False
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract(path: str, timeout: Optional[float]) -> List[str]:
+    """Worker: extract one file, interrupted by SIGALRM after `timeout` seconds."""
+    extractor = EXTRACTORS[os.path.splitext(path)[1].lower()]
+    if timeout is None or not hasattr(signal, "setitimer"):
+        return extractor(path)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extractor(path)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # ProcessPoolExecutor cannot cancel a running task; end its processes instead
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _lost(future) -> bool:
+    """True when a future went down with its pool (so its file must be extracted again)."""
+    if future.cancelled():
+        return True
+    return future.done() and isinstance(future.exception(), BrokenProcessPool)
+
+
+def extract_documents(
+    paths: Sequence[str],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = 60.0,
+    grace: float = 5.0,
+) -> Iterator[ExtractedDocument]:
+    """
+    Extract files in a process pool, yielding them in input order.
+
+    Args:
+        paths: PDF and DOCX files
+        max_workers: Worker processes (default: CPU count)
+        timeout: Seconds allowed per file (None = unlimited)
+        grace: Extra seconds the parent waits before restarting a stuck worker
+
+    Returns:
+        An iterator of ExtractedDocument, one per path
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    window = 2 * max_workers  # files submitted ahead of the one being yielded
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    in_flight: Dict[int, tuple] = {}  # index -> (future, submitted at)
+    next_index = 0
+
+    def submit(index: int) -> None:
+        in_flight[index] = (executor.submit(_extract, paths[index], timeout), time.perf_counter())
+
+    def restart() -> None:
+        nonlocal executor
+        _terminate(executor)
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def resubmit_lost() -> None:
+        for other in sorted(in_flight):
+            if _lost(in_flight[other][0]):
+                submit(other)
+
+    try:
+        for index, path in enumerate(paths):
+            resubmit_lost()
+            while next_index < len(paths) and next_index < index + window:
+                submit(next_index)
+                next_index += 1
+
+            retried = False
+            while True:
+                future, submitted = in_flight[index]
+                # Earlier files are done, so this one has been running since at most now
+                waited_from = time.perf_counter()
+                try:
+                    pieces = future.result(timeout=None if timeout is None else timeout + grace)
+                    document = ExtractedDocument(path, pieces, None, time.perf_counter() - submitted)
+                except ExtractionTimeout:
+                    document = ExtractedDocument(path, [], f"timed out after {timeout}s", time.perf_counter() - submitted)
+                except FutureTimeoutError:
+                    # Stuck where SIGALRM cannot interrupt it
+                    del in_flight[index]
+                    restart()
+                    resubmit_lost()
+                    document = ExtractedDocument(
+                        path, [], f"timed out after {timeout}s (worker restarted)", time.perf_counter() - waited_from
+                    )
+                except BrokenProcessPool:
+                    # Any worker's crash breaks the whole pool: retry this file alone, and
+                    # blame it only if that crashes too (the others are resubmitted after)
+                    restart()
+                    if not retried:
+                        retried = True
+                        submit(index)
+                        continue
+                    del in_flight[index]
+                    document = ExtractedDocument(path, [], "worker process died", time.perf_counter() - submitted)
+                except Exception as e:
+                    document = ExtractedDocument(
+                        path, [], f"{type(e).__name__}: {str(e)}", time.perf_counter() - submitted
+                    )
+                break
+            in_flight.pop(index, None)
+            yield document
+    finally:
+        if in_flight:
+            _terminate(executor)  # the caller stopped early
+        else:
+            executor.shutdown(wait=True)
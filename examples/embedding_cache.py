@@ -0,0 +1,255 @@
+"""
+Persistent Embedding Cache
+Never embeds the same text twice with the same model. Vectors live in a
+memory-mapped float32 file per model, indexed by the hash of the normalized
+text (Unicode NFC, surrounding whitespace stripped):
+
+    <directory>/<model>-<hash>/vectors.f32   rows of float32, grown as needed
+    <directory>/<model>-<hash>/index.tsv     "<text hash>\\t<row>" per line, append-only
+
+Lookups are batched and only the misses are sent to the embedding model, so
+chunks repeated across documents and document versions - and questions asked
+before - cost nothing. Several processes can share a cache directory:
+writers take an exclusive file lock (POSIX only) and readers pick up rows
+appended by others.
+
+Requirements:
+    pip install numpy langchain
+
+Usage:
+    embeddings = CachedEmbeddings(inner=OpenAIEmbeddings(), cache=get_embedding_cache(".agent_cache/embeddings", "text-embedding-ada-002"))
+    vectorstore = Chroma(persist_directory=".agent_cache/chroma", embedding_function=embeddings)
+    print(embeddings.cache.stats())  # hits, misses, rows stored
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+DEFAULT_CACHE_DIR = ".agent_cache/embeddings"
+INITIAL_CAPACITY = 1024
+
+
+def normalize_text(text: str) -> str:
+    """The form of a text that is hashed: Unicode NFC without surrounding whitespace."""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def text_key(text: str) -> str:
+    """Cache key of a text (hash of its normalized form)."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:32]
+
+
+def model_id_for(embeddings: Any) -> str:
+    """Best-effort model id of a LangChain embeddings object."""
+    for attribute in ("model", "model_name", "model_id"):
+        value = getattr(embeddings, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(embeddings).__name__
+
+
+class EmbeddingCache:
+    """Memory-mapped vectors of one embedding model, keyed by text hash."""
+
+    def __init__(self, directory: str, model_id: str):
+        """
+        Args:
+            directory: Cache root shared by all models
+            model_id: The embedding model; each model gets its own files
+        """
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)[:64]
+        model_hash = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:8]
+        self.model_id = model_id
+        self.directory = os.path.join(directory, f"{safe_name}-{model_hash}")
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.tsv")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.dimension: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._index_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _load_meta(self) -> None:
+        if self.dimension is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                self.dimension = json.load(f)["dimension"]
+
+    def _map(self) -> Optional[np.memmap]:
+        """(Re)map the vectors file when it has grown since it was mapped."""
+        if self.dimension is None or not os.path.exists(self.vectors_path):
+            return None
+        capacity = os.path.getsize(self.vectors_path) // (4 * self.dimension)
+        if self._vectors is None or len(self._vectors) != capacity:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        return self._vectors
+
+    def _refresh(self) -> None:
+        """Pick up index lines appended since the last read (by this or another process)."""
+        self._load_meta()
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # being written
+                key, _, row = line.decode("ascii").rstrip("\n").partition("\t")
+                self.rows[key] = int(row)
+                self._index_offset += len(line)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for texts, None for misses."""
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            if any(key not in self.rows for key in keys):
+                self._refresh()
+            vectors = self._map()
+            result = []
+            for key in keys:
+                row = self.rows.get(key)
+                if row is None or vectors is None or row >= len(vectors):
+                    self.misses += 1
+                    result.append(None)
+                else:
+                    self.hits += 1
+                    result.append(np.array(vectors[row]))
+            return result
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store the vectors of texts (already cached texts are skipped)."""
+        if not texts:
+            return
+        import fcntl  # POSIX only
+
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._lock, open(os.path.join(self.directory, "lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if self.dimension is None:
+                    self.dimension = int(array.shape[1])
+                    with open(self.meta_path, "w") as f:
+                        json.dump({"model_id": self.model_id, "dimension": self.dimension}, f)
+                if array.shape[1] != self.dimension:
+                    raise ValueError(f"Expected {self.dimension}-dimensional vectors for {self.model_id}, got {array.shape[1]}")
+
+                new: Dict[str, int] = {}
+                for index, text in enumerate(texts):
+                    key = text_key(text)
+                    if key not in self.rows and key not in new:
+                        new[key] = index
+                if not new:
+                    return
+
+                # Rows are numbered by the index, which may trail a crashed writer's vectors
+                start = max(self.rows.values(), default=-1) + 1
+                needed = start + len(new)
+                vectors_map = self._map()
+                capacity = 0 if vectors_map is None else len(vectors_map)
+                if needed > capacity:
+                    capacity = max(needed, 2 * capacity, INITIAL_CAPACITY)
+                    self._vectors = None
+                    with open(self.vectors_path, "ab") as f:
+                        f.truncate(capacity * 4 * self.dimension)
+                    vectors_map = self._map()
+
+                vectors_map[start:needed] = array[list(new.values())]
+                vectors_map.flush()  # vectors first, so an index line never points at garbage
+                lines = "".join(f"{key}\t{start + i}\n" for i, key in enumerate(new))
+                with open(self.index_path, "a") as f:
+                    f.write(lines)
+                self._refresh()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses and stored rows."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_id,
+                "rows": len(self.rows),
+                "dimension": self.dimension,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+_CACHES: Dict[str, EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_embedding_cache(directory: str = DEFAULT_CACHE_DIR, model_id: str = "") -> EmbeddingCache:
+    """The process-wide cache of a model in a directory (opened on first use)."""
+    name = f"{os.path.abspath(directory)}:{model_id}"
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            cache = _CACHES[name] = EmbeddingCache(directory, model_id)
+        return cache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that computes only vectors missing from an
+    EmbeddingCache. Queries share the cache with documents, as the models
+    used here embed both the same way.
+    """
+
+    def __init__(self, inner: Embeddings, cache: Optional[EmbeddingCache] = None, batch_size: int = 256):
+        """
+        Args:
+            inner: The embeddings to call on a miss
+            cache: Where vectors are kept (default: get_embedding_cache() for inner's model)
+            batch_size: Texts per inner embed_documents call
+        """
+        self.inner = inner
+        self.model = model_id_for(inner)
+        self.cache = cache if cache is not None else get_embedding_cache(DEFAULT_CACHE_DIR, self.model)
+        self.batch_size = batch_size
+        self.computed = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(texts)
+        # Each distinct missing text is embedded once, however often it repeats
+        missing: Dict[str, str] = {}
+        for text, vector in zip(texts, vectors):
+            if vector is None:
+                missing.setdefault(text_key(text), text)
+        if missing:
+            pending = list(missing.values())
+            computed: Dict[str, List[float]] = {}
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                batch_vectors = self.inner.embed_documents(batch)
+                self.cache.put_many(batch, batch_vectors)
+                computed.update(zip((text_key(text) for text in batch), batch_vectors))
+            self.computed += len(pending)
+            vectors = [computed[text_key(text)] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get_many([text])[0]
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self.cache.put_many([text], [vector])
+            self.computed += 1
+        return np.asarray(vector, dtype=np.float32).tolist()
@@ -0,0 +1,284 @@
+"""
+Local Embedding Service with Dynamic Batching
+Embeds on CPU with sentence-transformers instead of calling a hosted API.
+The model is loaded once per process, and requests from all threads
+(e.g. every Streamlit session) are coalesced into batches:
+
+    - a batch starts with the first waiting request and collects more for
+      at most `max_wait_ms`, or until `max_batch_size` texts are waiting
+    - texts are sorted by length before encoding, so each sub-batch pads
+      to similar lengths
+    - results go back to each caller in its own order
+    - requests cancelled while queued (an aembed() whose task was cancelled,
+      an embed() that timed out) are dropped and never block the worker
+
+stats() reports batch sizes, throughput and how long requests queued.
+Running this module measures batched throughput against concurrent callers:
+
+    python examples/embedding_service.py --callers 16 --requests 20
+
+Requirements:
+    pip install sentence-transformers numpy langchain
+
+Usage:
+    service = get_embedding_service("all-MiniLM-L6-v2")
+    vectors = service.embed(["first text", "second text"])  # float32 array, one row per text
+    print(service.stats())
+
+    # As LangChain embeddings (e.g. for Chroma), cached on disk
+    embeddings = CachedEmbeddings(LocalEmbeddings("all-MiniLM-L6-v2"))
+"""
+
+import argparse
+import asyncio
+import collections
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+def _percentile(samples: Sequence[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1]
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class EmbeddingService:
+    """One sentence-transformers model shared by all callers, with dynamic batching."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        device: str = "cpu",
+        encode: Optional[Callable[[List[str]], Any]] = None,
+        window: int = 1000,
+    ):
+        """
+        Args:
+            model_name: sentence-transformers model (loaded once, on the first request)
+            max_batch_size: Most texts encoded in one model call
+            max_wait_ms: Longest a request waits for others to share its batch
+            device: Torch device for the model
+            encode: Custom encoder (texts -> 2-D array); overrides model_name
+            window: Recent requests kept for the queue latency percentiles
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self.device = device
+        self._encode = encode
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.encode_seconds = 0.0
+        self.queue_latency = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"embed-{self.model_name}", daemon=True)
+                self._worker.start()
+
+    def _load(self) -> Callable[[List[str]], Any]:
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name, device=self.device)
+        return lambda texts: model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+    def _next(self, timeout: Optional[float] = None) -> Optional[_Request]:
+        """The next request that is still wanted (blocking), or None once the timeout is over."""
+        while True:
+            try:
+                if timeout is None:
+                    request = self._queue.get()
+                else:
+                    remaining = timeout - time.perf_counter()
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return None
+            # Once running, the future can no longer be cancelled, so its result can always be set
+            if request.future.set_running_or_notify_cancel():
+                return request
+
+    def _collect(self) -> List[_Request]:
+        """Block for the first request, then gather more until the batch is full or the wait is over."""
+        requests = [self._next()]
+        size = len(requests[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            request = self._next(deadline)
+            if request is None:
+                break
+            requests.append(request)
+            size += len(request.texts)
+        return requests
+
+    def _run(self) -> None:
+        try:
+            if self._encode is None:
+                self._encode = self._load()
+        except Exception as e:
+            # Fail every request, now and later, with the load error
+            while True:
+                self._next().future.set_exception(e)
+
+        while True:
+            requests = self._collect()
+            started = time.perf_counter()
+            texts = [text for request in requests for text in request.texts]
+            # Longest first, so each sub-batch pads to similar lengths
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+            vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+            try:
+                for start in range(0, len(order), self.max_batch_size):
+                    batch = order[start:start + self.max_batch_size]
+                    encoded = np.asarray(self._encode([texts[i] for i in batch]), dtype=np.float32)
+                    for i, vector in zip(batch, encoded):
+                        vectors[i] = vector
+                    with self._stats_lock:
+                        self.batches += 1
+                        self.batch_sizes.append(len(batch))
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            offset = 0
+            for request in requests:
+                rows = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.future.set_result(np.stack(rows) if rows else np.zeros((0, 0), dtype=np.float32))
+            with self._stats_lock:
+                self.requests += len(requests)
+                self.texts += len(texts)
+                self.encode_seconds += finished - started
+                self.queue_latency.extend(started - request.enqueued for request in requests)
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Queue texts for embedding; the future resolves to a float32 array (one row per text)."""
+        self._ensure_worker()
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        """Embed texts (blocking), batched with whatever other callers are embedding."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        future = self.submit(texts)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()  # still queued: the worker drops it
+            raise
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """embed() without blocking the event loop."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sizes, throughput and queue latency (p50/p95 over recent requests)."""
+        with self._stats_lock:
+            latencies = list(self.queue_latency)
+            sizes = list(self.batch_sizes)
+            p50 = _percentile(latencies, 50)
+            p95 = _percentile(latencies, 95)
+            return {
+                "model": self.model_name,
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "avg_batch_size": round(sum(sizes) / len(sizes), 1) if sizes else None,
+                "texts_per_second": round(self.texts / self.encode_seconds, 1) if self.encode_seconds else None,
+                "queue_depth": self._queue.qsize(),
+                "queue_latency_p50_ms": None if p50 is None else round(p50 * 1e3, 2),
+                "queue_latency_p95_ms": None if p95 is None else round(p95 * 1e3, 2),
+            }
+
+
+_SERVICES: Dict[str, EmbeddingService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_embedding_service(model_name: str = DEFAULT_MODEL, **options: Any) -> EmbeddingService:
+    """The process-wide service for a model (created with these options on first use)."""
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(model_name)
+        if service is None:
+            service = _SERVICES[model_name] = EmbeddingService(model_name, **options)
+        return service
+
+
+class LocalEmbeddings(Embeddings):
+    """LangChain Embeddings backed by the shared local EmbeddingService."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, **options: Any):
+        """
+        Args:
+            model_name: sentence-transformers model
+            **options: EmbeddingService options, used if the service is not created yet
+        """
+        self.model = model_name
+        self.service = get_embedding_service(model_name, **options)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.embed([text])[0].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dynamic batching of the local embedding service")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="sentence-transformers model")
+    parser.add_argument("--callers", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--requests", type=int, default=20, help="Single-text requests per caller")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model)
+    print(f"🧠 Embedding service: {args.model} ({args.callers} callers x {args.requests} requests)")
+    print("=" * 50)
+    service.embed(["warm-up"])  # load the model before timing
+
+    def caller(index: int) -> None:
+        for i in range(args.requests):
+            service.embed([f"caller {index} asks question number {i} about the documents"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(caller, range(args.callers)))
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  {args.callers * args.requests} requests in {elapsed:.2f}s")
+    print(f"📊 {service.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Arithmetic Fast Path
+Answers plain arithmetic questions ("What is 25 * 37?", "100 divided by 4",
+"2 to the power of 10") directly with the calculator instead of running a
+full ReAct loop with several LLM calls. Anything the router is not sure
+about is passed on to the agent unchanged.
+
+Usage:
+    router = FastPathRouter(agent.run, calculate)
+    router.run("What is 25 * 37?")   # answered without the LLM
+    router.run("Who invented zero?")  # answered by the agent
+    print(router.summary())
+"""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from calc_engine import ALLOWED_CHARS, ExpressionError, compile_expression
+
+# Leading phrases that only frame the question
+QUESTION_PREFIX = re.compile(
+    r"^(?:(?:please|hey|ok|so)\s+)*"
+    r"(?:what\s+is|what's|whats|how\s+much\s+is|calculate|compute|evaluate|solve|work\s+out|tell\s+me)?\s*",
+)
+
+# Word operators, longest phrases first
+WORD_OPERATORS = [
+    (r"\bto\s+the\s+power\s+of\b", "**"),
+    (r"\braised\s+to(?:\s+the\s+power\s+of)?\b", "**"),
+    (r"\bmultiplied\s+by\b", "*"),
+    (r"\bdivided\s+by\b", "/"),
+    (r"\bsquared\b", "** 2"),
+    (r"\bcubed\b", "** 3"),
+    (r"\bplus\b", "+"),
+    (r"\bminus\b", "-"),
+    (r"\btimes\b", "*"),
+    (r"\bover\b", "/"),
+    (r"(?<=\d)\s*[x×]\s*(?=\d)", "*"),
+    (r"÷", "/"),
+    (r"\^", "**"),
+]
+WORD_OPERATORS = [(re.compile(pattern), symbol) for pattern, symbol in WORD_OPERATORS]
+
+HAS_OPERATOR = re.compile(r"\d\s*(?:\*\*|[-+*/])\s*[-+(]*\s*\.?\d")
+
+
+def translate_operators(text: str) -> str:
+    """Replace operator words and signs ("divided by", "squared", "x", "^") in lowercase text with symbols."""
+    for pattern, symbol in WORD_OPERATORS:
+        text = pattern.sub(f" {symbol} ", text)
+    return text
+
+
+def to_expression(query: str) -> Optional[str]:
+    """
+    Translate a plain arithmetic question into a calculator expression.
+
+    Args:
+        query: The user's question
+
+    Returns:
+        The arithmetic expression, or None if the query is anything more than
+        arithmetic (the caller should then ask the agent)
+    """
+    text = query.strip().lower().rstrip("?.!= ").strip()
+    text = QUESTION_PREFIX.sub("", text, count=1)
+    expression = " ".join(translate_operators(text).split())
+
+    if not expression or not set(expression) <= ALLOWED_CHARS or not HAS_OPERATOR.search(expression):
+        return None
+    try:
+        compile_expression(expression)
+    except ExpressionError:
+        return None
+    return expression
+
+
+class FastPathRouter:
+    """
+    Routes queries either straight to the calculator or to the agent.
+
+    Tracks how often the fast path was taken and how much time it saved,
+    estimated from the average latency of the queries the agent did handle.
+    """
+
+    def __init__(
+        self,
+        agent_run: Callable[[str], str],
+        calculator: Callable[[str], str],
+        enabled: bool = True,
+        agent_arun: Optional[Callable[[str], Awaitable[str]]] = None,
+    ):
+        """
+        Args:
+            agent_run: Function answering a query with the agent (e.g. agent.run)
+            calculator: The calculator tool function (returns "Result: ...")
+            enabled: Set to False to always use the agent
+            agent_arun: Async version of agent_run (e.g. agent.arun) used by
+                arun(); defaults to running agent_run on a thread
+        """
+        self.agent_run = agent_run
+        self.agent_arun = agent_arun
+        self.calculator = calculator
+        self.enabled = enabled
+        self.fast_queries = 0
+        self.agent_queries = 0
+        self.fast_seconds = 0.0
+        self.agent_seconds = 0.0
+        # run() is called from worker threads (batch_runner)
+        self._lock = threading.Lock()
+
+    def _record(self, fast: bool, seconds: float) -> None:
+        with self._lock:
+            if fast:
+                self.fast_queries += 1
+                self.fast_seconds += seconds
+            else:
+                self.agent_queries += 1
+                self.agent_seconds += seconds
+
+    def try_fast_path(self, query: str) -> Optional[str]:
+        """Answer the query with the calculator, or return None if unsure."""
+        if not self.enabled:
+            return None
+        expression = to_expression(query)
+        if expression is None:
+            return None
+        result = self.calculator(expression)
+        if not result.startswith("Result: "):
+            # Let the agent explain errors in its own words
+            return None
+        return f"{expression} = {result[len('Result: '):]}"
+
+    def run(self, query: str) -> str:
+        """Answer a query, taking the fast path when possible."""
+        start = time.perf_counter()
+        answer = self.try_fast_path(query)
+        if answer is not None:
+            self._record(True, time.perf_counter() - start)
+            return answer
+
+        answer = self.agent_run(query)
+        self._record(False, time.perf_counter() - start)
+        return answer
+
+    async def arun(self, query: str) -> str:
+        """Async version of run() for concurrent query execution."""
+        start = time.perf_counter()
+        answer = self.try_fast_path(query)
+        if answer is not None:
+            self._record(True, time.perf_counter() - start)
+            return answer
+
+        if self.agent_arun is not None:
+            answer = await self.agent_arun(query)
+        else:
+            answer = await asyncio.get_running_loop().run_in_executor(None, self.agent_run, query)
+        self._record(False, time.perf_counter() - start)
+        return answer
+
+    def _snapshot(self):
+        with self._lock:
+            return self.fast_queries, self.fast_seconds, self.agent_queries, self.agent_seconds
+
+    @property
+    def fast_path_rate(self) -> float:
+        """Fraction of queries answered without the agent."""
+        fast_queries, _, agent_queries, _ = self._snapshot()
+        total = fast_queries + agent_queries
+        return fast_queries / total if total else 0.0
+
+    @property
+    def estimated_seconds_saved(self) -> Optional[float]:
+        """Estimated agent time avoided, or None before the agent has run once."""
+        fast_queries, fast_seconds, agent_queries, agent_seconds = self._snapshot()
+        if not agent_queries:
+            return None
+        return fast_queries * agent_seconds / agent_queries - fast_seconds
+
+    def summary(self) -> str:
+        """One-line report of fast path usage and latency saved."""
+        fast_queries, fast_seconds, agent_queries, agent_seconds = self._snapshot()
+        total = fast_queries + agent_queries
+        rate = fast_queries / total if total else 0.0
+        line = f"⚡ Fast path: {fast_queries}/{total} queries ({rate:.0%})"
+        if fast_queries:
+            line += f", {fast_seconds / fast_queries * 1e3:.2f} ms avg"
+        if agent_queries:
+            average_agent = agent_seconds / agent_queries
+            line += f", ~{fast_queries * average_agent - fast_seconds:.2f}s saved vs {average_agent:.2f}s per agent query"
+        return line
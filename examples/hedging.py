@@ -0,0 +1,239 @@
+"""
+Hedged LLM Requests
+Cuts tail latency by racing a duplicate request against a slow one. When a
+call has not returned after the p95 (configurable) of recent call
+latencies, the same request is sent again; whichever finishes first wins
+and the other is cancelled (async) or abandoned (blocking calls cannot be
+interrupted, so its result is simply discarded).
+
+Hedges cost money, so they are capped by a budget: at most `budget` extra
+requests per request overall (0.05 = 5%). No hedging happens until
+`min_samples` latencies have been observed.
+
+HedgedLLM wraps any LangChain LLM or chat model (OpenAI, ChatOpenAI,
+ChatAnthropic, ChatGoogleGenerativeAI, ...) without changing its answers,
+so the response cache key and the rest of the agent stay the same. Only
+hedge idempotent requests - with temperature 0 both copies return the
+same answer anyway.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    llm = hedged(OpenAI(temperature=0), percentile=95, budget=0.05)
+    agent = initialize_agent(tools, llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION)
+    ...
+    print(llm.hedger.stats())
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain.llms.base import LLM
+
+
+class Hedger:
+    """Runs calls with a hedge after a latency percentile, within a budget."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.0,
+        max_workers: int = 32,
+    ):
+        """
+        Args:
+            percentile: Hedge once a call is slower than this percentile of recent latencies
+            budget: Maximum extra requests as a fraction of all requests
+            window: Number of recent latencies the percentile is computed over
+            min_samples: Latencies needed before hedging starts
+            min_delay: Never hedge earlier than this many seconds
+            max_workers: Threads for blocking calls (each hedged call uses two)
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        rank = max(1, math.ceil(self.percentile / 100 * len(ordered)))
+        return max(self.min_delay, ordered[rank - 1])
+
+    def _start_request(self) -> Optional[float]:
+        with self._lock:
+            self.requests += 1
+        return self.hedge_delay()
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _won(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def _timed(self, func: Callable[[], Any]) -> Callable[[], Any]:
+        def run():
+            start = time.perf_counter()
+            result = func()
+            self.record(time.perf_counter() - start)
+            return result
+        return run
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """Run a blocking call, hedging it if it gets slow."""
+        delay = self._start_request()
+        if delay is None:
+            return self._timed(func)()
+
+        primary = self._executor.submit(self._timed(func))
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+
+        hedge = self._executor.submit(self._timed(func))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()  # only stops it if it has not started
+                    if future is hedge:
+                        self._won()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await a call, hedging it if it gets slow; the loser is cancelled."""
+        async def timed():
+            start = time.perf_counter()
+            result = await func()
+            self.record(time.perf_counter() - start)
+            return result
+
+        delay = self._start_request()
+        if delay is None:
+            return await timed()
+
+        primary = asyncio.ensure_future(timed())
+        try:
+            done, _ = await asyncio.wait([primary], timeout=delay)
+        except asyncio.CancelledError:
+            # asyncio.wait() does not cancel what it waits for
+            primary.cancel()
+            raise
+        if done or not self._take_budget():
+            return await primary
+
+        hedge = asyncio.ensure_future(timed())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._won()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request/hedge counters and the current hedge delay."""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": round(self.hedges / max(1, self.requests), 4),
+                "hedge_wins": self.hedge_wins,
+                "hedge_delay_ms": None if delay is None else round(delay * 1e3, 1),
+                "samples": len(self._latencies),
+            }
+
+
+class HedgedLLM(LLM):
+    """LLM wrapper that hedges slow calls to the wrapped LLM or chat model."""
+
+    inner: Any
+    hedger: Any
+
+    @property
+    def _llm_type(self) -> str:
+        # Hedging never changes answers, so it must not change cache keys either
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if hasattr(self.inner, "predict"):
+            return self.hedger.call(lambda: self.inner.predict(prompt, stop=stop))
+        return self.hedger.call(lambda: self.inner(prompt, stop=stop))
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if hasattr(self.inner, "apredict"):
+            return await self.hedger.acall(lambda: self.inner.apredict(prompt, stop=stop))
+        return await asyncio.get_running_loop().run_in_executor(None, self._call, prompt, stop)
+
+
+def hedged(llm, **options: Any) -> HedgedLLM:
+    """
+    Wrap an LLM so slow calls are hedged.
+
+    Args:
+        llm: Any LangChain LLM or chat model
+        **options: Hedger options (percentile, budget, window, min_samples, min_delay)
+
+    Returns:
+        The hedged LLM; its Hedger (and stats) is at .hedger
+    """
+    return HedgedLLM(inner=llm, hedger=Hedger(**options))
@@ -0,0 +1,172 @@
+"""
+Pooled LLM HTTP Clients
+One long-lived, connection-pooling httpx client per provider for the whole
+process. Re-creating OpenAI(...) on every Streamlit rerun also creates a new
+HTTP client, so nearly every request pays DNS + TCP + TLS setup before the
+first token; a shared client keeps connections alive and reuses them
+(HTTP/2 when the `h2` package is installed, so concurrent requests share a
+single connection).
+
+warm_up() opens connections ahead of the first real request (e.g. at app
+startup). Running this module measures the difference:
+
+    python examples/http_pool.py --requests 10
+    python examples/http_pool.py --url https://api.anthropic.com/v1/messages
+
+Requirements:
+    pip install httpx          (installed with openai>=1.0)
+    pip install h2             (optional, enables HTTP/2)
+
+Usage:
+    llm = OpenAI(
+        temperature=0,
+        client=openai.OpenAI(http_client=get_http_client("openai")).completions,  # llm(...), agent.run
+        async_client=openai.AsyncOpenAI(http_client=get_async_http_client("openai")).completions,  # agent.arun
+    )
+    warm_up("openai")
+"""
+
+import argparse
+import importlib.util
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+PROVIDER_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com/v1",
+    "google": "https://generativelanguage.googleapis.com/v1beta",
+}
+
+# LLM calls are slow to produce a first byte; only connecting should fail fast
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=120.0)
+
+_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """True when the optional h2 package (needed for HTTP/2) is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client(provider: str) -> httpx.Client:
+    """The process-wide pooled client for a provider (created on first use)."""
+    with _lock:
+        client = _clients.get(provider)
+        if client is None:
+            client = _clients[provider] = httpx.Client(
+                http2=http2_available(), timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS
+            )
+        return client
+
+
+def get_async_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    The process-wide pooled async client for a provider.
+
+    Async clients are bound to the event loop that first uses them; share
+    one only between coroutines running on the same loop.
+    """
+    with _lock:
+        client = _async_clients.get(provider)
+        if client is None:
+            client = _async_clients[provider] = httpx.AsyncClient(
+                http2=http2_available(), timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS
+            )
+        return client
+
+
+def warm_up(provider: str, connections: int = 1, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Open connections to a provider ahead of the first real request.
+
+    Sends unauthenticated GETs to the provider's base URL; the response
+    (usually 401/404) is irrelevant, the pooled TLS connection is what counts.
+
+    Args:
+        provider: A key of PROVIDER_BASE_URLS
+        connections: Number of connections to open
+        background: Return immediately and warm up on a daemon thread
+
+    Returns:
+        The warm-up thread when background is set
+    """
+    client = get_http_client(provider)
+    url = PROVIDER_BASE_URLS[provider]
+
+    def request() -> None:
+        try:
+            client.get(url)
+        except httpx.HTTPError:
+            pass  # offline; the first real request will connect
+
+    def connect() -> None:
+        # Concurrent requests are needed to open more than one connection
+        threads = [threading.Thread(target=request) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    if not background:
+        connect()
+        return None
+    thread = threading.Thread(target=connect, name=f"warm-up-{provider}", daemon=True)
+    thread.start()
+    return thread
+
+
+def time_to_first_byte(client: httpx.Client, url: str) -> float:
+    """Seconds from sending a GET until the first response byte arrives."""
+    start = time.perf_counter()
+    with client.stream("GET", url) as response:
+        next(response.iter_bytes(), b"")
+    return time.perf_counter() - start
+
+
+def measure(url: str, requests: int) -> Dict[str, List[float]]:
+    """
+    Time-to-first-byte with a new client per request vs one pooled client.
+
+    Returns:
+        "new client" / "pooled" -> one sample in seconds per request
+    """
+    samples: Dict[str, List[float]] = {"new client": [], "pooled": []}
+    for _ in range(requests):
+        with httpx.Client(timeout=DEFAULT_TIMEOUT) as client:
+            samples["new client"].append(time_to_first_byte(client, url))
+
+    with httpx.Client(http2=http2_available(), timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS) as client:
+        time_to_first_byte(client, url)  # connection setup, as warm_up() does at startup
+        for _ in range(requests):
+            samples["pooled"].append(time_to_first_byte(client, url))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure connection reuse savings against an LLM endpoint")
+    parser.add_argument("--url", default=PROVIDER_BASE_URLS["openai"] + "/models", help="URL to request")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per variant")
+    args = parser.parse_args()
+
+    print(f"🔌 Time to first byte: {args.url} ({args.requests} requests each, HTTP/2: {http2_available()})")
+    print("=" * 50)
+    try:
+        samples = measure(args.url, args.requests)
+    except httpx.HTTPError as e:
+        print(f"❌ Error: {str(e)}")
+        return
+    medians = {name: statistics.median(values) * 1e3 for name, values in samples.items()}
+    for name, median in medians.items():
+        print(f"{name:<12} p50 {median:8.1f} ms   max {max(samples[name]) * 1e3:8.1f} ms")
+    print(f"\n✅ Pooling saves {medians['new client'] - medians['pooled']:.1f} ms per request (p50)")
+
+
+if __name__ == "__main__":
+    main()
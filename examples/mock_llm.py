@@ -0,0 +1,158 @@
+"""
+Scripted Mock LLM
+A deterministic, offline stand-in for OpenAI(...) that replays scripted ReAct
+traces. Use it to profile and load-test the agent stack (prompt building,
+output parsing, tool dispatch, memory) without an API key or network.
+
+Latency is configurable: `latency` seconds before the first token and
+`tokens_per_second` for the rest of the completion (0 = instant). With
+`streaming=True` the completion is delivered token by token to the
+callbacks (on_llm_new_token) at that pace, like OpenAI(streaming=True).
+
+Requirements:
+    pip install langchain
+
+Usage:
+    from mock_llm import ScriptedLLM
+
+    llm = ScriptedLLM(latency=0.3, tokens_per_second=50)
+    agent = initialize_agent(tools=[calc_tool], llm=llm,
+                             agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION)
+
+    # Replay recorded traces: {"What is 25 * 37?": ["<step 1>", "<step 2>"]}
+    llm = ScriptedLLM.from_file("traces.json")
+"""
+
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain.llms.base import LLM
+from langchain.schema.output import GenerationChunk
+
+from fast_path import to_expression
+
+QUESTION_PATTERN = re.compile(r"^Question:\s*(.*)$", re.MULTILINE)
+OBSERVATION_PATTERN = re.compile(r"^Observation:\s*(.*)$", re.MULTILINE)
+STREAM_TOKEN_PATTERN = re.compile(r"\s*\S{1,4}|\s+")
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def default_completion(question: str, observations: List[str]) -> str:
+    """
+    Produce the next ReAct step for an unscripted question.
+
+    The first step sends arithmetic to the Calculator tool; once an
+    observation is available, its value becomes the final answer.
+    """
+    if observations:
+        answer = observations[-1].strip()
+        if answer.startswith("Result: "):
+            answer = answer[len("Result: "):]
+        return f" I now know the final answer.\nFinal Answer: {answer}"
+
+    expression = to_expression(question)
+    if expression is None:
+        return " I cannot answer this with a calculator.\nFinal Answer: I don't know."
+    return f" I should use the calculator.\nAction: Calculator\nAction Input: {expression}"
+
+
+class ScriptedLLM(LLM):
+    """
+    Offline LLM that replays ReAct traces.
+
+    The question and the current step are read from the ReAct prompt
+    ("Question: ..." and the number of "Observation:" lines so far). Scripted
+    questions replay their completions step by step; everything else falls
+    back to default_completion().
+    """
+
+    script: Dict[str, List[str]] = {}
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    streaming: bool = False
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "ScriptedLLM":
+        """Load traces from a JSON file mapping questions to completions."""
+        with open(path, "r") as f:
+            return cls(script=json.load(f), **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "tokens_per_second": self.tokens_per_second}
+
+    def completion_for(self, prompt: str) -> str:
+        """Return the full (untruncated) completion for a prompt."""
+        questions = QUESTION_PATTERN.findall(prompt)
+        question = questions[-1].strip() if questions else prompt.strip()
+        # Only count observations that belong to the current question
+        scratchpad = prompt[prompt.rfind("Question:"):]
+        observations = OBSERVATION_PATTERN.findall(scratchpad)
+
+        steps = self.script.get(question)
+        if steps:
+            return steps[min(len(observations), len(steps) - 1)]
+        return default_completion(question, observations)
+
+    def _completion(self, prompt: str, stop: Optional[List[str]]) -> str:
+        """The completion cut at the first stop sequence, with usage counted."""
+        text = self.completion_for(prompt)
+        for stop_sequence in stop or []:
+            index = text.find(stop_sequence)
+            if index != -1:
+                text = text[:index]
+
+        self.calls += 1
+        self.prompt_tokens += count_tokens(prompt)
+        self.completion_tokens += count_tokens(text)
+        return text
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if self.streaming:
+            return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+        text = self._completion(prompt, stop)
+        delay = self.latency
+        if self.tokens_per_second > 0:
+            delay += count_tokens(text) / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+        return text
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        text = self._completion(prompt, stop)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        # Pieces of up to four characters, i.e. about one token each
+        for piece in STREAM_TOKEN_PATTERN.findall(text):
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            chunk = GenerationChunk(text=piece)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -0,0 +1,256 @@
+"""
+Parallel Tool Calls
+A meta-tool that lets a ReAct agent run several independent tool calls in a
+single step. Instead of one LLM round-trip per lookup:
+
+    Action: parallel_tools
+    Action Input: [{"tool": "Search", "input": "weather in Paris"},
+                   {"tool": "Calculator", "input": "25 * 37"},
+                   {"tool": "ReadFile", "input": "notes.txt"}]
+
+the calls run concurrently - on a thread pool, or as asyncio tasks for tools
+with a coroutine when the agent runs async - each under its own timeout, and
+their observations come back as one batch:
+
+    [1] Search: Sunny, 21°C
+    [2] Calculator: 925
+    [3] ReadFile: Error: timed out after 5.0s
+
+A failing or slow call only affects its own observation. Timed-out threads
+cannot be interrupted; they finish in the background and their result is
+dropped.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    runner = ParallelToolRunner([search_tool, calc_tool, file_tool], timeouts={"Search": 5.0})
+    agent = initialize_agent(tools=[search_tool, calc_tool, file_tool, runner.as_tool()], ...)
+    ...
+    print(runner.stats())  # batches, calls, timeouts, time saved vs sequential
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.tools import Tool
+
+TOOL_NAME = "parallel_tools"
+
+
+class ToolCallError(ValueError):
+    """Raised when the meta-tool input is not a valid list of tool calls."""
+
+
+def parse_calls(text: str) -> List[Tuple[str, str]]:
+    """
+    Parse the meta-tool input into (tool name, tool input) pairs.
+
+    Args:
+        text: JSON list of {"tool": ..., "input": ...} objects
+
+    Returns:
+        The calls, in order
+    """
+    try:
+        data = json.loads(text.strip().strip("`"))
+    except ValueError as e:
+        raise ToolCallError(f"Input must be a JSON list of {{\"tool\": ..., \"input\": ...}} objects ({e})")
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not data:
+        raise ToolCallError("Input must be a non-empty JSON list of tool calls")
+
+    calls = []
+    for item in data:
+        if not isinstance(item, dict) or "tool" not in item:
+            raise ToolCallError(f"Every call needs a \"tool\" key, got {json.dumps(item)}")
+        tool_input = item.get("input", "")
+        if not isinstance(tool_input, str):
+            tool_input = json.dumps(tool_input)
+        calls.append((str(item["tool"]), tool_input))
+    return calls
+
+
+class ParallelToolRunner:
+    """Runs batches of independent tool calls concurrently."""
+
+    def __init__(
+        self,
+        tools: Sequence[Tool],
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0,
+        max_workers: int = 8,
+        max_calls: int = 10,
+    ):
+        """
+        Args:
+            tools: The tools that may be called
+            timeouts: Seconds allowed per call, by tool name
+            default_timeout: Seconds allowed for tools not in `timeouts`
+            max_workers: Threads shared by all batches
+            max_calls: Most calls accepted in one batch
+        """
+        self.tools = {tool.name: tool for tool in tools}
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.max_calls = max_calls
+        self.batches = 0
+        self.calls = 0
+        self.errors = 0
+        self.timed_out = 0
+        self.wall_time = 0.0
+        self.sequential_time = 0.0  # sum of the individual call durations
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="parallel-tools")
+        self._lock = threading.Lock()
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    def _check(self, calls: List[Tuple[str, str]]) -> None:
+        if len(calls) > self.max_calls:
+            raise ToolCallError(f"At most {self.max_calls} calls per batch, got {len(calls)}")
+
+    def _timed(self, tool: Tool, tool_input: str) -> Tuple[str, float]:
+        start = time.perf_counter()
+        output = tool.run(tool_input)
+        return str(output), time.perf_counter() - start
+
+    def _record(self, outcomes: List[Tuple[str, float, str]], wall: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.calls += len(outcomes)
+            self.wall_time += wall
+            for status, seconds, _ in outcomes:
+                self.sequential_time += seconds
+                if status == "error":
+                    self.errors += 1
+                elif status == "timeout":
+                    self.timed_out += 1
+
+    def run(self, calls: List[Tuple[str, str]]) -> List[str]:
+        """
+        Run calls concurrently on the thread pool.
+
+        Returns:
+            One observation per call, in call order
+        """
+        self._check(calls)
+        start = time.perf_counter()
+        futures = []
+        for name, tool_input in calls:
+            tool = self.tools.get(name)
+            futures.append(None if tool is None else self._executor.submit(self._timed, tool, tool_input))
+
+        outcomes = []
+        for (name, _), future in zip(calls, futures):
+            timeout = self.timeout_for(name)
+            if future is None:
+                outcomes.append(("error", 0.0, self._unknown(name)))
+                continue
+            # Every call's clock started when the batch did
+            remaining = max(0.0, start + timeout - time.perf_counter())
+            try:
+                output, seconds = future.result(timeout=remaining)
+                outcomes.append(("ok", seconds, output))
+            except FutureTimeoutError:
+                future.cancel()
+                outcomes.append(("timeout", timeout, f"Error: timed out after {timeout}s"))
+            except Exception as e:
+                outcomes.append(("error", time.perf_counter() - start, f"Error: {str(e)}"))
+
+        self._record(outcomes, time.perf_counter() - start)
+        return [output for _, _, output in outcomes]
+
+    async def _arun_one(self, name: str, tool_input: str) -> Tuple[str, float, str]:
+        tool = self.tools.get(name)
+        if tool is None:
+            return "error", 0.0, self._unknown(name)
+        timeout = self.timeout_for(name)
+        start = time.perf_counter()
+        try:
+            if getattr(tool, "coroutine", None) is not None:
+                output = await asyncio.wait_for(tool.arun(tool_input), timeout)
+            else:
+                loop = asyncio.get_running_loop()
+                output, _ = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._timed, tool, tool_input), timeout
+                )
+        except asyncio.TimeoutError:
+            return "timeout", timeout, f"Error: timed out after {timeout}s"
+        except Exception as e:
+            return "error", time.perf_counter() - start, f"Error: {str(e)}"
+        return "ok", time.perf_counter() - start, str(output)
+
+    async def arun(self, calls: List[Tuple[str, str]]) -> List[str]:
+        """
+        Run calls concurrently as asyncio tasks (thread pool for sync-only tools).
+
+        Returns:
+            One observation per call, in call order
+        """
+        self._check(calls)
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._arun_one(name, tool_input) for name, tool_input in calls))
+        self._record(outcomes, time.perf_counter() - start)
+        return [output for _, _, output in outcomes]
+
+    def _unknown(self, name: str) -> str:
+        return f"Error: unknown tool {name!r} (available: {', '.join(self.tools)})"
+
+    @staticmethod
+    def format(calls: List[Tuple[str, str]], observations: List[str]) -> str:
+        """Join observations into one batch, numbered in call order."""
+        return "\n".join(
+            f"[{i}] {name}: {observation}" for i, ((name, _), observation) in enumerate(zip(calls, observations), 1)
+        )
+
+    def as_tool(self, name: str = TOOL_NAME) -> Tool:
+        """
+        The meta-tool for the agent.
+
+        Its description lists the available tools, so the LLM knows what it
+        can batch; bad input comes back as an observation the LLM can fix.
+        """
+        def func(text: str) -> str:
+            try:
+                calls = parse_calls(text)
+                return self.format(calls, self.run(calls))
+            except ToolCallError as e:
+                return f"Error: {str(e)}"
+
+        async def coroutine(text: str) -> str:
+            try:
+                calls = parse_calls(text)
+                return self.format(calls, await self.arun(calls))
+            except ToolCallError as e:
+                return f"Error: {str(e)}"
+
+        description = (
+            "Run several independent tool calls at once and get all observations together. "
+            "Use it instead of calling tools one at a time when the calls do not depend on each other. "
+            f"Input: a JSON list like [{{\"tool\": \"<name>\", \"input\": \"<input>\"}}, ...] "
+            f"with at most {self.max_calls} calls. Tools: {', '.join(self.tools)}."
+        )
+        return Tool(name=name, func=func, description=description, coroutine=coroutine)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batches, calls, failures and the time saved compared to running calls one by one."""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "calls": self.calls,
+                "errors": self.errors,
+                "timed_out": self.timed_out,
+                "wall_seconds": round(self.wall_time, 3),
+                "sequential_seconds": round(self.sequential_time, 3),
+                "saved_seconds": round(max(0.0, self.sequential_time - self.wall_time), 3),
+            }
+
+    def close(self) -> None:
+        """Shut down the thread pool without waiting for timed-out calls."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,392 @@
+"""
+Incremental Document Ingestion for RAG
+Keeps a vector store in sync with a set of documents without re-embedding
+everything on every run. A JSON manifest remembers, per document, its size,
+modification time, content hash and the ids of its chunks:
+
+    unchanged size + mtime    -> skipped without reading the file
+    same content hash         -> skipped (only the manifest is touched)
+    changed content           -> re-split; only new chunks are embedded,
+                                 chunks that disappeared are deleted
+    document gone             -> all its chunks are deleted
+
+Chunk ids are content hashes (source + chunk text + occurrence), so a chunk
+that survives an edit keeps its id and its vector. Changing the splitter
+settings or the embedding model rebuilds the index.
+
+During a run, each document's new entry is appended to a journal next to
+the manifest (so an interrupted run resumes where it stopped); the manifest
+itself is rewritten once, at the end of the run.
+
+Files are read through a memory map and split by StreamingSplitter (the
+same chunks as CharacterTextSplitter), and new chunks are embedded in
+batches as they are produced, so even multi-GB files ingest in constant
+memory. PDF and DOCX text is extracted in a process pool (doc_extract)
+while earlier documents are being embedded; a file that fails, times out or
+cannot be read or decoded is reported and left as it was, to be retried on
+the next run.
+
+Requirements:
+    pip install langchain langchain-community chromadb openai
+
+Usage:
+    python examples/rag_ingest.py docs/ --persist-directory .agent_cache/chroma
+    python examples/rag_ingest.py docs/ --local-embeddings all-MiniLM-L6-v2   (no API calls)
+
+    indexer = IncrementalIndexer(vectorstore, ".agent_cache/chroma/manifest.json",
+                                 embedding_model="text-embedding-ada-002")
+    print(indexer.index(["docs/"]))  # new, changed, unchanged, chunks added/reused/deleted
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from doc_extract import EXTRACTORS, can_extract, document_pieces, extract_documents
+from embedding_cache import CachedEmbeddings
+from embedding_service import LocalEmbeddings
+from stream_chunker import StreamingSplitter, batched
+
+MANIFEST_VERSION = 1
+TEXT_SUFFIXES = (".txt", ".md")
+DOCUMENT_SUFFIXES = TEXT_SUFFIXES + tuple(EXTRACTORS)
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class DocumentReadError(Exception):
+    """Raised when a document cannot be read or decoded."""
+
+
+def _read_errors(chunks: Iterable[str]) -> Iterator[str]:
+    # Reading happens lazily, between vector store calls; only its errors belong to the file
+    try:
+        yield from chunks
+    except (OSError, UnicodeDecodeError) as e:
+        raise DocumentReadError(f"{type(e).__name__}: {str(e)}") from e
+
+
+def file_hash(path: str) -> str:
+    """sha256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def with_chunk_ids(source: str, chunks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """(content-hashed id, chunk) pairs; repeats of the same text in a document are numbered."""
+    occurrences: Dict[str, int] = {}
+    for chunk in chunks:
+        text_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        occurrence = occurrences.get(text_hash, 0)
+        occurrences[text_hash] = occurrence + 1
+        yield hashlib.sha256(f"{source}\0{text_hash}\0{occurrence}".encode("utf-8")).hexdigest(), chunk
+
+
+def expand_paths(paths: Sequence[str], suffixes: Sequence[str] = DOCUMENT_SUFFIXES) -> List[str]:
+    """Files to ingest: the given files plus matching files under the given directories, sorted."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.update(os.path.join(directory, name) for name in names if name.lower().endswith(tuple(suffixes)))
+        else:
+            files.add(path)
+    return sorted(os.path.abspath(path) for path in files)
+
+
+class Manifest:
+    """
+    What is in the vector store, per document: a JSON file (written
+    atomically) plus a journal of the documents changed since it was written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.params: Dict[str, Any] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._journal = None
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.params = data["params"]
+                self.documents = data["documents"]
+        if os.path.exists(self.journal_path):
+            self._replay()
+
+    def _replay(self) -> None:
+        with open(self.journal_path, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn by a crash; that document is indexed again
+                record = json.loads(line)
+                if record["entry"] is None:
+                    self.documents.pop(record["path"], None)
+                else:
+                    self.documents[record["path"]] = record["entry"]
+
+    def _append(self, path: str, entry: Optional[Dict[str, Any]]) -> None:
+        if self._journal is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._journal = open(self.journal_path, "a")
+        self._journal.write(json.dumps({"path": path, "entry": entry}) + "\n")
+        self._journal.flush()
+
+    def set(self, path: str, entry: Dict[str, Any]) -> None:
+        """Record a document's entry (journaled until the next save)."""
+        self.documents[path] = entry
+        self._append(path, entry)
+
+    def remove(self, path: str) -> Dict[str, Any]:
+        """Forget a document (journaled until the next save); returns its entry."""
+        entry = self.documents.pop(path)
+        self._append(path, None)
+        return entry
+
+    def save(self) -> None:
+        """Write the whole manifest and drop the journal."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "params": self.params, "documents": self.documents}, f)
+        os.replace(tmp_path, self.path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class IncrementalIndexer:
+    """Syncs documents into a LangChain vector store, embedding only new chunks."""
+
+    def __init__(
+        self,
+        vectorstore,
+        manifest_path: str,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 0,
+        separator: str = "\n\n",
+        embedding_model: str = "",
+        batch_size: int = 64,
+        encoding: str = "utf-8",
+        extract_workers: Optional[int] = None,
+        extract_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            vectorstore: A vector store supporting add_texts(..., ids=) and delete(ids=), e.g. Chroma
+            manifest_path: Where to keep the manifest
+            chunk_size: Splitter chunk size
+            chunk_overlap: Splitter chunk overlap
+            separator: Splitter separator
+            embedding_model: Embedding model id; changing it rebuilds the index
+            batch_size: Chunks embedded per add_texts call
+            encoding: Text file encoding
+            extract_workers: Processes extracting PDF/DOCX text (default: CPU count)
+            extract_timeout: Seconds allowed per PDF/DOCX file
+        """
+        self.vectorstore = vectorstore
+        self.manifest = Manifest(manifest_path)
+        self.splitter = StreamingSplitter(separator=separator, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.batch_size = batch_size
+        self.encoding = encoding
+        self.extract_workers = extract_workers
+        self.extract_timeout = extract_timeout
+        self.errors: Dict[str, str] = {}  # path -> why it could not be indexed (last run)
+        self.params = {
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "separator": separator,
+            "embedding_model": embedding_model,
+        }
+
+    def split(self, path: str) -> Iterator[str]:
+        """The chunks of a document, as the RAG example splits them."""
+        return self.splitter.split_file(path, self.encoding)
+
+    def _delete(self, ids: List[str]) -> None:
+        for start in range(0, len(ids), self.batch_size):
+            self.vectorstore.delete(ids=ids[start:start + self.batch_size])
+
+    def _add(self, new: List[Tuple[str, str]], source: str) -> None:
+        self.vectorstore.add_texts(
+            [chunk for _, chunk in new], metadatas=[{"source": source}] * len(new), ids=[chunk_id for chunk_id, _ in new]
+        )
+
+    def _rebuild_if_needed(self, stats: Dict[str, int]) -> None:
+        if self.manifest.params == self.params:
+            return
+        # Old vectors (if any) were made with other settings and cannot be reused
+        for entry in self.manifest.documents.values():
+            self._delete(entry["chunks"])
+            stats["chunks_deleted"] += len(entry["chunks"])
+        self.manifest.documents = {}
+        self.manifest.params = self.params
+        self.manifest.save()
+
+    def _changed(self, path: str, stats: Dict[str, int]) -> Optional[Tuple[Optional[Dict[str, Any]], str, Any]]:
+        """(manifest entry, content hash, stat) of a document that needs indexing, None if unchanged."""
+        stat = os.stat(path)
+        entry = self.manifest.documents.get(path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            stats["unchanged"] += 1
+            return None
+
+        content_hash = file_hash(path)
+        if entry is not None and entry["hash"] == content_hash:
+            self.manifest.set(path, dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            stats["unchanged"] += 1
+            return None
+        return entry, content_hash, stat
+
+    def index_file(self, path: str, stats: Dict[str, int]) -> None:
+        """Bring one text document's chunks in the vector store up to date."""
+        change = self._changed(path, stats)
+        if change is not None:
+            self._store(path, _read_errors(self.split(path)), change, stats)
+
+    def _store(self, path: str, chunks: Iterable[str], change: Tuple, stats: Dict[str, int]) -> None:
+        """Embed a changed document's new chunks and delete its stale ones."""
+        entry, content_hash, stat = change
+        old_ids = set(entry["chunks"]) if entry is not None else set()
+        ids: List[str] = []
+        added: List[str] = []
+        # Only ids are kept; chunk text is embedded batch by batch as the file streams
+        try:
+            for batch in batched(with_chunk_ids(path, chunks), self.batch_size):
+                ids.extend(chunk_id for chunk_id, _ in batch)
+                new = [(chunk_id, chunk) for chunk_id, chunk in batch if chunk_id not in old_ids]
+                if new:
+                    self._add(new, path)
+                    added.extend(chunk_id for chunk_id, _ in new)
+        except DocumentReadError:
+            # Leave the document as it was: drop what this attempt added
+            self._delete(added)
+            raise
+        stale = sorted(old_ids - set(ids))
+        self._delete(stale)
+        # Journaled per document, so an interrupted run resumes where it stopped
+        self.manifest.set(path, {
+            "hash": content_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "chunks": ids,
+        })
+
+        stats["changed" if entry is not None else "new"] += 1
+        stats["chunks_added"] += len(added)
+        stats["chunks_reused"] += len(ids) - len(added)
+        stats["chunks_deleted"] += len(stale)
+
+    def _failed(self, path: str, error: str, stats: Dict[str, int]) -> None:
+        self.errors[path] = error
+        stats["failed"] += 1
+
+    def index(self, paths: Sequence[str], prune: bool = True) -> Dict[str, int]:
+        """
+        Sync files and directories into the vector store.
+
+        Args:
+            paths: Files and/or directories (searched for DOCUMENT_SUFFIXES)
+            prune: Delete the chunks of indexed documents that are no longer among `paths`
+
+        Returns:
+            Counts of new/changed/unchanged/removed/failed documents and added/reused/deleted chunks
+            (the reasons for failures are in .errors)
+        """
+        stats = dict.fromkeys(
+            ("new", "changed", "unchanged", "removed", "failed", "chunks_added", "chunks_reused", "chunks_deleted"), 0
+        )
+        self.errors = {}
+        self._rebuild_if_needed(stats)
+        files = expand_paths(paths)
+        changed = []
+        for path in files:
+            try:
+                change = self._changed(path, stats)
+            except OSError as e:
+                self._failed(path, f"{type(e).__name__}: {str(e)}", stats)
+                continue
+            if change is not None:
+                changed.append((path, change))
+
+        # PDF/DOCX files are extracted ahead in a process pool, in the order they are needed
+        extracted = extract_documents(
+            [path for path, _ in changed if can_extract(path)], self.extract_workers, self.extract_timeout
+        )
+        for path, change in changed:
+            if not can_extract(path):
+                try:
+                    self._store(path, _read_errors(self.split(path)), change, stats)
+                except DocumentReadError as e:
+                    self._failed(path, str(e), stats)
+                continue
+            document = next(extracted)
+            if not document.ok:
+                self._failed(path, document.error, stats)
+                continue
+            self._store(path, self.splitter.split_pieces(document_pieces(document)), change, stats)
+
+        if prune:
+            for path in sorted(set(self.manifest.documents) - set(files)):
+                entry = self.manifest.remove(path)
+                self._delete(entry["chunks"])
+                stats["removed"] += 1
+                stats["chunks_deleted"] += len(entry["chunks"])
+        self.manifest.save()
+        return stats
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Incrementally index documents into a Chroma vector store")
+    parser.add_argument("paths", nargs="+", help="Files or directories to index")
+    parser.add_argument("--persist-directory", default=".agent_cache/chroma", help="Chroma directory")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Characters per chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=0, help="Characters shared by neighbouring chunks")
+    parser.add_argument("--extract-workers", type=int, help="Processes extracting PDF/DOCX text (default: CPU count)")
+    parser.add_argument("--extract-timeout", type=float, default=60.0, help="Seconds allowed per PDF/DOCX file")
+    parser.add_argument(
+        "--local-embeddings",
+        nargs="?",
+        const="all-MiniLM-L6-v2",
+        metavar="MODEL",
+        help="Embed on CPU with this sentence-transformers model instead of OpenAI"
+    )
+    parser.add_argument("--no-prune", action="store_true", help="Keep documents that are no longer listed")
+    args = parser.parse_args(argv)
+
+    from langchain.embeddings import OpenAIEmbeddings
+    from langchain.vectorstores import Chroma
+
+    # Chunks already embedded for any document (or version) are not embedded again
+    if args.local_embeddings:
+        embeddings = CachedEmbeddings(LocalEmbeddings(args.local_embeddings))
+    else:
+        embeddings = CachedEmbeddings(OpenAIEmbeddings())
+    vectorstore = Chroma(persist_directory=args.persist_directory, embedding_function=embeddings)
+    indexer = IncrementalIndexer(
+        vectorstore,
+        os.path.join(args.persist_directory, "manifest.json"),
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        embedding_model=embeddings.model,
+        extract_workers=args.extract_workers,
+        extract_timeout=args.extract_timeout,
+    )
+    print(f"📚 Indexing {', '.join(args.paths)} into {args.persist_directory}")
+    print("=" * 50)
+    stats = indexer.index(args.paths, prune=not args.no_prune)
+    print(f"📄 Documents: {stats['new']} new, {stats['changed']} changed, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed, {stats['failed']} failed")
+    for path, error in indexer.errors.items():
+        print(f"❌ {path}: {error}")
+    print(f"🧩 Chunks: {stats['chunks_added']} added, {stats['chunks_reused']} reused, "
+          f"{stats['chunks_deleted']} deleted")
+    print(f"💾 Embedding cache: {embeddings.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
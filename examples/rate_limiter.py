@@ -0,0 +1,372 @@
+"""
+Shared Token-Bucket Rate Limiter
+Keeps every caller of a provider/model under its requests-per-minute (RPM)
+and tokens-per-minute (TPM) limits, so concurrent Streamlit sessions queue
+up instead of tripping 429 cascades.
+
+Each limiter holds two token buckets (RPM and TPM) that refill continuously
+and allow bursts of up to one minute's worth. Callers queue first-come,
+first-served: only the head of the queue may take capacity, so a large
+request is never starved by a stream of small ones. Token use is reserved
+from an estimate before the call and corrected with the actual count after.
+
+Limiters are process-wide (get_limiter), and can optionally be shared by
+several processes on one machine by keeping the bucket levels in a state
+file guarded by an exclusive file lock (POSIX only).
+
+Usage:
+    limiter = get_limiter("openai", "gpt-3.5-turbo-instruct", rpm=60, tpm=60_000)
+    llm = RateLimitedLLM(inner=OpenAI(temperature=0), limiter=limiter)
+    ...
+    print(limiter.stats())  # queue depth, waits, available capacity
+
+    # Shared by all processes using the same state file
+    limiter = get_limiter("openai", "gpt-4", rpm=500, tpm=30_000, state_path=".agent_cache/ratelimits.json")
+"""
+
+import asyncio
+import collections
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.llms.base import LLM
+
+from mock_llm import count_tokens
+from streaming import forward_tokens
+
+# Completion tokens reserved when the LLM does not declare max_tokens
+DEFAULT_COMPLETION_TOKENS = 256
+
+# How often an async waiter behind others rechecks whether it is at the head of the queue
+ASYNC_POLL_SECONDS = 0.05
+
+
+def _refill(level: float, limit: Optional[float], elapsed: float) -> float:
+    if limit is None:
+        return 0.0
+    return min(limit, level + elapsed * limit / 60.0)
+
+
+def _take(levels: List[float], limits: Tuple[Optional[float], Optional[float]],
+          amounts: Tuple[float, float], elapsed: float) -> float:
+    """
+    Refill both buckets and take amounts if both have enough.
+
+    Returns 0.0 when taken, otherwise the seconds until there will be enough.
+    """
+    wait = 0.0
+    for i, (limit, amount) in enumerate(zip(limits, amounts)):
+        levels[i] = _refill(levels[i], limit, elapsed)
+        if limit is not None:
+            needed = min(amount, limit)  # oversized requests wait for a full bucket
+            if levels[i] < needed:
+                wait = max(wait, (needed - levels[i]) * 60.0 / limit)
+    if wait == 0.0:
+        for i, (limit, amount) in enumerate(zip(limits, amounts)):
+            if limit is not None:
+                levels[i] -= amount
+    return wait
+
+
+class LocalBuckets:
+    """Bucket levels kept in this process."""
+
+    def __init__(self, limits: Tuple[Optional[float], Optional[float]]):
+        self.levels = [limit or 0.0 for limit in limits]
+        self.updated = time.monotonic()
+
+    def take(self, limits, amounts) -> float:
+        now = time.monotonic()
+        wait = _take(self.levels, limits, amounts, now - self.updated)
+        self.updated = now
+        return wait
+
+    def adjust(self, tokens: float) -> None:
+        self.levels[1] -= tokens
+
+    def snapshot(self, limits) -> List[float]:
+        return [_refill(level, limit, time.monotonic() - self.updated) for level, limit in zip(self.levels, limits)]
+
+
+class FileBuckets:
+    """
+    Bucket levels kept in a JSON state file shared by several processes.
+
+    Every read-modify-write happens under an exclusive lock on
+    `<state_path>.lock`; one file can hold the buckets of many limiters.
+    """
+
+    def __init__(self, state_path: str, key: str, limits: Tuple[Optional[float], Optional[float]]):
+        import fcntl  # POSIX only
+
+        self._fcntl = fcntl
+        self.state_path = state_path
+        self.key = key
+        self.limits = limits
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+
+    def _update(self, change) -> Any:
+        with open(f"{self.state_path}.lock", "a") as lock:
+            self._fcntl.flock(lock, self._fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path, "r") as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                now = time.time()  # wall clock: shared between processes
+                levels, updated = state.get(self.key, ([limit or 0.0 for limit in self.limits], now))
+                result = change(levels, max(0.0, now - updated))
+                state[self.key] = (levels, now)
+                tmp_path = f"{self.state_path}.tmp{os.getpid()}"
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+                return result
+            finally:
+                self._fcntl.flock(lock, self._fcntl.LOCK_UN)
+
+    def take(self, limits, amounts) -> float:
+        return self._update(lambda levels, elapsed: _take(levels, limits, amounts, elapsed))
+
+    def adjust(self, tokens: float) -> None:
+        def change(levels, elapsed):
+            levels[:] = [_refill(level, limit, elapsed) for level, limit in zip(levels, self.limits)]
+            levels[1] -= tokens
+        self._update(change)
+
+    def snapshot(self, limits) -> List[float]:
+        def change(levels, elapsed):
+            levels[:] = [_refill(level, limit, elapsed) for level, limit in zip(levels, limits)]
+            return list(levels)
+        return self._update(change)
+
+
+class RateLimiter:
+    """Fair (FIFO) RPM + TPM limiter for one provider/model."""
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            name: Identifies the provider/model (and its entry in a shared state file)
+            rpm: Requests per minute (None = unlimited)
+            tpm: Tokens per minute (None = unlimited)
+            state_path: Share the buckets with other processes through this file
+        """
+        self.name = name
+        self.limits = (rpm, tpm)
+        if state_path is None:
+            self.buckets = LocalBuckets(self.limits)
+        else:
+            self.buckets = FileBuckets(state_path, name, self.limits)
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queue_depth = 0
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _join(self, ticket: object) -> None:
+        with self._condition:
+            self._queue.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+
+    def _try_take(self, ticket: object, tokens: float) -> Optional[float]:
+        """Take capacity if ticket is at the head: 0.0 when taken, else seconds to wait (None = not the head)."""
+        if self._queue[0] is not ticket:
+            return None
+        return self.buckets.take(self.limits, (1, tokens))
+
+    def _within_timeout(self, wait: Optional[float], timeout: Optional[float], start: float) -> Optional[float]:
+        if timeout is None:
+            return wait
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            raise TimeoutError(f"Rate limiter '{self.name}': no capacity within {timeout}s")
+        return remaining if wait is None else min(wait, remaining)
+
+    def _leave(self, ticket: object) -> None:
+        # Caller holds the condition
+        self._queue.remove(ticket)
+        self._condition.notify_all()
+
+    def _acquired(self, start: float) -> float:
+        # Caller holds the condition
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None) -> float:
+        """
+        Wait for capacity for one request of `tokens` tokens, in arrival order.
+
+        Args:
+            tokens: Estimated tokens (prompt + completion) of the request
+            timeout: Give up after this many seconds (raises TimeoutError)
+
+        Returns:
+            Seconds spent waiting
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._condition:
+            self._join(ticket)
+            try:
+                while True:
+                    wait = self._try_take(ticket, tokens)
+                    if wait == 0.0:
+                        break
+                    self._condition.wait(self._within_timeout(wait, timeout, start))
+            finally:
+                self._leave(ticket)
+            return self._acquired(start)
+
+    async def aacquire(self, tokens: float = 0, timeout: Optional[float] = None) -> float:
+        """
+        acquire() without blocking the event loop or a thread.
+
+        Waits in the same queue as blocking callers, sleeping on the event loop;
+        capacity is only taken at the moment it is granted, so a waiter that is
+        cancelled or times out takes nothing.
+        """
+        ticket = object()
+        start = time.monotonic()
+        self._join(ticket)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(ticket, tokens)
+                if wait == 0.0:
+                    break
+                await asyncio.sleep(self._within_timeout(ASYNC_POLL_SECONDS if wait is None else wait, timeout, start))
+        finally:
+            with self._condition:
+                self._leave(ticket)
+        with self._condition:
+            return self._acquired(start)
+
+    def adjust(self, tokens: float) -> None:
+        """Charge (positive) or refund (negative) tokens once the actual usage is known."""
+        if self.limits[1] is not None and tokens:
+            with self._condition:
+                self.buckets.adjust(tokens)
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and currently available capacity."""
+        with self._condition:
+            available = self.buckets.snapshot(self.limits)
+            return {
+                "name": self.name,
+                "rpm": self.limits[0],
+                "tpm": self.limits[1],
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "delayed": self.delayed,
+                "avg_wait_ms": round(self.total_wait / max(1, self.acquired) * 1e3, 1),
+                "max_wait_ms": round(self.max_wait * 1e3, 1),
+                "available_requests": None if self.limits[0] is None else round(available[0], 1),
+                "available_tokens": None if self.limits[1] is None else round(available[1]),
+            }
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str, model: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                state_path: Optional[str] = None) -> RateLimiter:
+    """The process-wide limiter for a provider/model (created with these limits on first use)."""
+    name = f"{provider}:{model}"
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(name)
+        if limiter is None:
+            limiter = _LIMITERS[name] = RateLimiter(name, rpm, tpm, state_path)
+        return limiter
+
+
+class RateLimitedLLM(LLM):
+    """LLM wrapper that waits for rate-limiter capacity before every call."""
+
+    inner: Any
+    limiter: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _reserve(self, prompt: str) -> int:
+        max_tokens = self.inner._identifying_params.get("max_tokens")
+        if not isinstance(max_tokens, int) or max_tokens <= 0:
+            max_tokens = DEFAULT_COMPLETION_TOKENS
+        return count_tokens(prompt) + max_tokens
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        reserved = self._reserve(prompt)
+        self.limiter.acquire(reserved)
+        callbacks = forward_tokens(run_manager)
+        if hasattr(self.inner, "predict"):
+            text = self.inner.predict(prompt, stop=stop, callbacks=callbacks)
+        else:
+            text = self.inner(prompt, stop=stop, callbacks=callbacks)
+        self.limiter.adjust(count_tokens(prompt) + count_tokens(text) - reserved)
+        return text
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        if not hasattr(self.inner, "apredict"):
+            return await asyncio.get_running_loop().run_in_executor(None, self._call, prompt, stop)
+        reserved = self._reserve(prompt)
+        await self.limiter.aacquire(reserved)
+        text = await self.inner.apredict(prompt, stop=stop, callbacks=forward_tokens(run_manager))
+        self.limiter.adjust(count_tokens(prompt) + count_tokens(text) - reserved)
+        return text
+
+
+def rate_limited(llm, provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 state_path: Optional[str] = None) -> RateLimitedLLM:
+    """
+    Wrap an LLM with the shared limiter of its provider and model.
+
+    Args:
+        llm: Any LangChain LLM or chat model
+        provider: Provider name, e.g. "openai" or "anthropic"
+        rpm: Requests per minute (None = unlimited)
+        tpm: Tokens per minute (None = unlimited)
+        state_path: Share the limits with other processes through this file
+
+    Returns:
+        The rate-limited LLM; its limiter (and stats) is at .limiter
+    """
+    params = llm._identifying_params
+    model = params.get("model_name") or params.get("model") or llm._llm_type
+    return RateLimitedLLM(inner=llm, limiter=get_limiter(provider, str(model), rpm, tpm, state_path))
@@ -0,0 +1,181 @@
+"""
+Incremental ReAct Parsing with Early Stop
+Watches a ReAct completion while it streams and ends the LLM call as soon as
+the step is decided, instead of waiting for the model to finish talking:
+
+    Thought: I should use the calculator.
+    Action: Calculator
+    Action Input: 25 * 37          <- complete here; the tool can run now
+    Thought: Let me wait for ...   <- never generated
+
+An action is complete once its Action Input line ends (or, for inputs that
+start with '{' or '[', once the JSON brackets balance). Stop sequences are
+also enforced client-side, including extra ones such as a hallucinated
+"Observation:" or a new "Question:", for providers that ignore or limit the
+`stop` parameter. Final answers are streamed to the end.
+
+EarlyStopLLM wraps any streaming LangChain LLM or chat model; the agent's
+normal output parser then sees a clean "Action/Action Input" completion and
+dispatches the tool right away.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    llm = EarlyStopLLM(inner=OpenAI(temperature=0, streaming=True))
+    agent = initialize_agent(tools, llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION)
+    ...
+    print(llm.stats())
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain.llms.base import LLM
+
+# Cut even when the provider did not stop on them
+EXTRA_STOP_SEQUENCES = ("\nObservation:", "\n\tObservation:", "\nQuestion:")
+
+ACTION_INPUT_PATTERN = re.compile(r"Action\s*\d*\s*:[^\n]*\n\s*Action\s*\d*\s*Input\s*\d*\s*:[ \t]*", re.IGNORECASE)
+FINAL_ANSWER_PATTERN = re.compile(r"Final Answer\s*:", re.IGNORECASE)
+
+
+def json_end(text: str, start: int) -> Optional[int]:
+    """Index just past the JSON value opening at text[start], or None if it is not closed yet."""
+    depth = 0
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+
+class ReActStreamParser:
+    """
+    Finds where a streaming ReAct completion can be cut.
+
+    feed() the text so far; it returns the cut position once the step is
+    complete (an action with its whole input, or a stop sequence), else None.
+    """
+
+    def __init__(self, stop: Sequence[str] = (), single_line_input: bool = True):
+        """
+        Args:
+            stop: Stop sequences (the agent's plus EXTRA_STOP_SEQUENCES are enforced)
+            single_line_input: An Action Input ends at the end of its line
+        """
+        self.stop = tuple(dict.fromkeys(tuple(stop) + EXTRA_STOP_SEQUENCES))
+        self.single_line_input = single_line_input
+        self.reason: Optional[str] = None  # "action" or "stop" once cut
+
+    def _stop_position(self, text: str) -> Optional[int]:
+        positions = [index for index in (text.find(sequence) for sequence in self.stop) if index != -1]
+        return min(positions) if positions else None
+
+    def _action_end(self, text: str) -> Optional[int]:
+        if FINAL_ANSWER_PATTERN.search(text):
+            return None
+        match = ACTION_INPUT_PATTERN.search(text)
+        if match is None or match.end() >= len(text):
+            return None
+        start = match.end()
+        if text[start] in "{[":
+            return json_end(text, start)
+        if not self.single_line_input:
+            return None
+        newline = text.find("\n", start)
+        return newline if newline != -1 else None
+
+    def feed(self, text: str) -> Optional[int]:
+        """Return where to cut the completion, or None to keep generating."""
+        stop_at = self._stop_position(text)
+        action_end = self._action_end(text if stop_at is None else text[:stop_at])
+        if action_end is not None:
+            self.reason = "action"
+            return action_end
+        if stop_at is not None:
+            self.reason = "stop"
+            return stop_at
+        return None
+
+
+def iter_text(llm, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> Iterator[str]:
+    """Stream a completion as text pieces from an LLM or chat model."""
+    for chunk in llm.stream(prompt, stop=stop, **kwargs):
+        yield chunk if isinstance(chunk, str) else chunk.content
+
+
+class EarlyStopLLM(LLM):
+    """LLM wrapper that stops streaming generation once the ReAct step is decided."""
+
+    inner: Any
+    single_line_input: bool = True
+    calls: int = 0
+    early_stops: int = 0
+    stop_sequence_cuts: int = 0
+    chars_discarded: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        parser = ReActStreamParser(stop or (), self.single_line_input)
+        text = ""
+        emitted = 0
+        pieces = iter_text(self.inner, prompt, stop=stop)
+        try:
+            for piece in pieces:
+                text += piece
+                cut = parser.feed(text)
+                end = len(text) if cut is None else cut
+                # Forward only what survives the cut (tokens may straddle it)
+                if run_manager is not None and end > emitted:
+                    run_manager.on_llm_new_token(text[emitted:end])
+                emitted = max(emitted, end)
+                if cut is not None:
+                    self.chars_discarded += len(text) - cut
+                    text = text[:cut]
+                    break
+        finally:
+            pieces.close()  # ends the provider's stream, so generation stops
+
+        self.calls += 1
+        if parser.reason == "action":
+            self.early_stops += 1
+        elif parser.reason == "stop":
+            self.stop_sequence_cuts += 1
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        """How many calls were cut early, and why."""
+        return {
+            "calls": self.calls,
+            "early_stops": self.early_stops,
+            "stop_sequence_cuts": self.stop_sequence_cuts,
+            "chars_discarded": self.chars_discarded,
+        }
@@ -0,0 +1,462 @@
+"""
+Retries, Deadlines and Circuit Breaking for Agent Calls
+A small resilience layer for agent.run and LLM calls:
+
+    classify      - retryable (rate limits, timeouts, 5xx, connection errors)
+                    vs fatal (bad request, authentication, parse errors)
+    Retry-After   - 429/503 responses are retried no earlier than the server asks
+    backoff       - decorrelated jitter, so clients that failed together do not
+                    retry together
+    deadline      - an overall time budget per request, across all attempts; a
+                    blocking attempt runs on a worker thread, so a hung call is
+                    abandoned (not killed) when the deadline passes
+    breaker       - a circuit breaker shared by every caller of a provider; while
+                    the provider is down, calls fail fast instead of piling up
+    metrics       - attempts, retries, give-ups and breaker state
+
+Requirements:
+    None beyond the standard library (errors from openai, httpx, requests and
+    anthropic are recognized by their status code and class name)
+
+Usage:
+    policy = RetryPolicy(max_attempts=4, deadline=30, breaker=get_breaker("openai"))
+    answer = policy.call(agent.run, "What is 25 * 37?")
+    answer = await policy.acall(agent.arun, "What is 25 * 37?")
+    print(policy.stats())
+"""
+
+import asyncio
+import concurrent.futures
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Class-name fragments of provider SDK errors (matched case-insensitively)
+RETRYABLE_NAMES = ("ratelimit", "timeout", "apiconnection", "connecterror", "serviceunavailable",
+                   "internalserver", "overloaded", "apierror", "tryagain")
+FATAL_NAMES = ("authentication", "permissiondenied", "invalidrequest", "badrequest", "notfound",
+               "unprocessable", "outputparser")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the overall deadline leaves no time for another attempt."""
+
+
+class _RaisedTimeout(Exception):
+    """Carries a TimeoutError raised by the called function itself past asyncio.wait_for."""
+
+    def __init__(self, error: BaseException):
+        super().__init__(error)
+        self.error = error
+
+
+class _AttemptAbandoned(Exception):
+    """A blocking attempt was still running when the deadline passed."""
+
+
+async def _tag_timeouts(awaitable):
+    # Tells the function's own timeouts (retryable) apart from the deadline's
+    try:
+        return await awaitable
+    except asyncio.TimeoutError as e:
+        raise _RaisedTimeout(e) from e
+
+
+def _attach_streamlit_context(thread: threading.Thread) -> None:
+    # Streamlit widgets (e.g. streaming callbacks) only work on threads that carry the script's context
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+
+
+def _start_attempt(func: Callable, args, kwargs) -> concurrent.futures.Future:
+    """Run one blocking attempt on a daemon thread, so the caller can stop waiting for it."""
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    thread = threading.Thread(target=target, name="retry-attempt", daemon=True)
+    _attach_streamlit_context(thread)
+    thread.start()
+    return future
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """The HTTP status carried by a provider error, if any."""
+    for attribute in ("status_code", "http_status", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether an error is worth retrying.
+
+    HTTP status wins when present; otherwise the exception type decides.
+    Unknown errors are fatal - retrying a bug only multiplies it.
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    names = " ".join(cls.__name__.lower() for cls in type(error).__mro__)
+    if any(name in names for name in FATAL_NAMES):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(name in names for name in RETRYABLE_NAMES)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds the server asked us to wait (Retry-After / retry-after-ms), if any.
+
+    Both delay-seconds and HTTP-date forms of Retry-After are understood.
+    """
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class DecorrelatedJitter:
+    """
+    Decorrelated-jitter backoff: each delay is uniform(base, 3 x previous),
+    capped. Spreads retries out far better than fixed or plain exponential
+    delays when many clients fail at the same moment.
+    """
+
+    def __init__(self, base: float = 0.5, cap: float = 20.0, rng: Optional[random.Random] = None):
+        self.base = base
+        self.cap = cap
+        self._previous = base
+        self._random = rng or random.Random()
+
+    def next_delay(self) -> float:
+        self._previous = min(self.cap, self._random.uniform(self.base, self._previous * 3))
+        return self._previous
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive retryable failures;
+    open -> half-open after `recovery_seconds`, when a single trial call is
+    let through; a successful trial closes the circuit again. A trial that
+    ends without an outcome (cancelled, interrupted) is released, so the next
+    call becomes the trial.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may go through now.
+
+        Returns:
+            True if the call is the half-open trial (release() it if it ends
+            without success or failure)
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            remaining = max(0.0, self.recovery_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"Circuit '{self.name}' is open; retry in {remaining:.1f}s")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Let another call be the half-open trial (this one was abandoned)."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    logger.warning("Circuit '%s' opened after %d failures", self.name, self.failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0) -> CircuitBreaker:
+    """The process-wide circuit breaker for a provider (created on first use)."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name, failure_threshold, recovery_seconds)
+        return breaker
+
+
+class RetryPolicy:
+    """Retries retryable errors with jittered backoff inside an overall deadline."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        deadline: Optional[float] = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            max_attempts: Attempts per request, including the first
+            base_delay: Smallest backoff delay in seconds
+            max_delay: Largest backoff delay in seconds
+            deadline: Overall seconds per request across all attempts (None = unbounded)
+            breaker: Shared circuit breaker consulted before every attempt
+            sleep: Blocking sleep (replaceable for simulations)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker
+        self.sleep = sleep
+        self.metrics = {
+            "requests": 0, "successes": 0, "attempts": 0, "retries": 0, "retry_after_honored": 0,
+            "fatal": 0, "exhausted": 0, "deadline_exceeded": 0, "circuit_rejected": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.metrics[name] += 1
+
+    def _before_attempt(self) -> bool:
+        """Count the attempt and consult the breaker; True if it is the breaker's half-open trial."""
+        self._count("attempts")
+        if self.breaker is None:
+            return False
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("circuit_rejected")
+            raise
+
+    def _abandoned(self, trial: bool) -> None:
+        # Cancelled or interrupted (BaseException): no outcome to record, but the trial slot must be freed
+        if trial:
+            self.breaker.release()
+
+    def _after_failure(self, error: Exception, attempt: int, backoff: DecorrelatedJitter, started: float) -> float:
+        """Record a failure and return the delay before the next attempt, or re-raise."""
+        retryable = is_retryable(error)
+        if self.breaker is not None:
+            if retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()  # the provider answered, just not usefully
+        if not retryable:
+            self._count("fatal")
+            raise error
+        if attempt >= self.max_attempts:
+            self._count("exhausted")
+            raise error
+
+        delay = backoff.next_delay()
+        requested = retry_after(error)
+        if requested is not None:
+            self._count("retry_after_honored")
+            delay = max(delay, requested)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(
+                f"No time left for attempt {attempt + 1} within {self.deadline}s deadline"
+            ) from error
+
+        self._count("retries")
+        logger.warning("Attempt %d failed (%s: %s); retrying in %.2fs", attempt, type(error).__name__, error, delay)
+        return delay
+
+    def _succeeded(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_success()
+        self._count("successes")
+
+    def _deadline_exceeded(self) -> DeadlineExceeded:
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        self._count("deadline_exceeded")
+        return DeadlineExceeded(f"Request exceeded its {self.deadline}s deadline")
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) under this policy (blocking).
+
+        With a deadline, each attempt runs on a worker thread bounded by the
+        time left; a call still running at the deadline is abandoned, not
+        interrupted, and its eventual result is discarded.
+        """
+        self._count("requests")
+        backoff = DecorrelatedJitter(self.base_delay, self.max_delay)
+        started = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            trial = self._before_attempt()
+            try:
+                if self.deadline is None:
+                    result = func(*args, **kwargs)
+                else:
+                    remaining = self.deadline - (time.monotonic() - started)
+                    future = _start_attempt(func, args, kwargs)
+                    # wait() rather than result(timeout): func's own TimeoutError must stay retryable
+                    done, _ = concurrent.futures.wait([future], timeout=max(0.0, remaining))
+                    if not done:
+                        future.cancel()
+                        raise _AttemptAbandoned()
+                    result = future.result()
+            except _AttemptAbandoned:
+                raise self._deadline_exceeded() from None
+            except Exception as e:
+                self.sleep(self._after_failure(e, attempt, backoff, started))
+                continue
+            except BaseException:
+                self._abandoned(trial)
+                raise
+            self._succeeded()
+            return result
+
+    async def acall(self, func: Callable, *args, **kwargs):
+        """Await func(*args, **kwargs) under this policy; each attempt is bounded by the deadline."""
+        self._count("requests")
+        backoff = DecorrelatedJitter(self.base_delay, self.max_delay)
+        started = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            trial = self._before_attempt()
+            try:
+                if self.deadline is None:
+                    result = await func(*args, **kwargs)
+                else:
+                    remaining = self.deadline - (time.monotonic() - started)
+                    result = await asyncio.wait_for(_tag_timeouts(func(*args, **kwargs)), max(0.0, remaining))
+            except _RaisedTimeout as e:
+                # func timed out on its own (e.g. an HTTP read timeout): an ordinary retryable error
+                await asyncio.sleep(self._after_failure(e.error, attempt, backoff, started))
+                continue
+            except asyncio.TimeoutError as e:
+                raise self._deadline_exceeded() from e
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, attempt, backoff, started))
+                continue
+            except BaseException:
+                self._abandoned(trial)
+                raise
+            self._succeeded()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry metrics, plus the breaker state if one is attached."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.metrics)
+        if self.breaker is not None:
+            stats["breaker"] = self.breaker.stats()
+        return stats
+
+
+def safe_agent_run(agent, query: str, policy: Optional[RetryPolicy] = None) -> str:
+    """
+    Run an agent query with retries, a deadline and the shared circuit breaker.
+
+    Args:
+        agent: Anything with run(query)
+        query: The user query
+        policy: Retry policy (default: 3 attempts, 30s deadline, "openai" breaker)
+
+    Returns:
+        The agent's answer, or an "Error: ..." message
+    """
+    if policy is None:
+        policy = RetryPolicy(max_attempts=3, deadline=30.0, breaker=get_breaker("openai"))
+    try:
+        return policy.call(agent.run, query)
+    except CircuitOpenError as e:
+        return f"Error: Service temporarily unavailable ({e})"
+    except DeadlineExceeded as e:
+        return f"Error: Timed out ({e})"
+    except Exception as e:
+        logger.error("Query failed: %s: %s", type(e).__name__, e)
+        return f"Error: Unable to process query ({type(e).__name__}: {e})"
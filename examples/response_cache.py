@@ -0,0 +1,234 @@
+"""
+Persistent Response Cache
+An exact-match, disk-backed (SQLite) cache in front of agent.run. The key is
+the normalized query plus the agent configuration (LLM type and parameters
+such as model and temperature, agent type and tool set), so changing the
+model or the tools never serves a stale answer.
+
+Entries expire after an optional TTL, the table is kept under `max_entries`
+by evicting the least recently used rows, and hit/miss/eviction counters are
+kept for reporting. Only deterministic agents (temperature 0) are cached by
+default.
+
+Usage:
+    cache = ResponseCache(".agent_cache/responses.sqlite", ttl_seconds=86400)
+    cached = CachedAgent(agent, cache)
+    cached.run("What is 25 * 37?")  # LLM call
+    cached.run("what is 25 * 37")   # served from disk
+    print(cache.stats())
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return TRAILING_PUNCTUATION.sub("", " ".join(query.lower().split()))
+
+
+def agent_config(agent) -> Dict[str, Any]:
+    """
+    Describe everything about an agent that can change its answers.
+
+    Args:
+        agent: An AgentExecutor returned by initialize_agent()
+
+    Returns:
+        JSON-serializable configuration (LLM type and parameters, agent type, tools)
+    """
+    llm = agent.agent.llm_chain.llm
+    return {
+        "llm": llm._llm_type,
+        "params": {k: v for k, v in llm._identifying_params.items() if isinstance(v, (str, int, float, bool, type(None)))},
+        "agent": type(agent.agent).__name__,
+        "tools": sorted(tool.name for tool in agent.tools),
+    }
+
+
+def is_deterministic(config: Dict[str, Any]) -> bool:
+    """True when the configuration samples at temperature 0 (or has no temperature)."""
+    return config.get("params", {}).get("temperature", 0) == 0
+
+
+class ResponseCache:
+    """SQLite-backed exact-match cache with TTL and LRU size bound."""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 10_000):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            ttl_seconds: Entries older than this are treated as misses (None = never expire)
+            max_entries: Least recently used entries beyond this are evicted
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, query TEXT, answer TEXT, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._size = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(query: str, config: Dict[str, Any]) -> str:
+        """Cache key for a query under an agent configuration."""
+        payload = json.dumps([normalize_query(query), config], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, config: Dict[str, Any]) -> Optional[str]:
+        """Return the cached answer, or None on a miss or expired entry."""
+        key = self.key(query, config)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT answer, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, query: str, config: Dict[str, Any], answer: str) -> None:
+        """Store an answer, evicting least recently used entries beyond max_entries."""
+        key = self.key(query, config)
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO responses (key, query, answer, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, query, answer, now, now),
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._db.execute(
+                    "UPDATE responses SET answer = ?, created = ?, accessed = ? WHERE key = ?",
+                    (answer, now, now, key),
+                )
+            excess = self._size - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+                self._size -= excess
+                self.evictions += excess
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self._size -= cursor.rowcount
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "evictions": self.evictions,
+            "entries": self._size,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class TieredCache:
+    """
+    Consults several caches in order (e.g. exact match, then semantic).
+
+    A hit in a later tier is copied into the earlier ones, so the next
+    identical query is served by the cheapest tier.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+
+    def get(self, query: str, config: Dict[str, Any]) -> Optional[str]:
+        for position, tier in enumerate(self.tiers):
+            answer = tier.get(query, config)
+            if answer is not None:
+                for earlier in self.tiers[:position]:
+                    earlier.put(query, config, answer)
+                return answer
+        return None
+
+    def put(self, query: str, config: Dict[str, Any], answer: str) -> None:
+        for tier in self.tiers:
+            tier.put(query, config, answer)
+
+    def stats(self) -> Dict[str, Any]:
+        return {type(tier).__name__: tier.stats() for tier in self.tiers}
+
+
+class CachedAgent:
+    """
+    Wraps an agent so run()/arun() consult a response cache first.
+
+    Non-deterministic agents (temperature > 0) bypass the cache unless
+    cache_nondeterministic is set.
+    """
+
+    def __init__(self, agent, cache, config: Optional[Dict[str, Any]] = None, cache_nondeterministic: bool = False):
+        """
+        Args:
+            agent: The AgentExecutor to wrap
+            cache: A ResponseCache (or any object with get/put(query, config, ...))
+            config: Agent configuration for the key (default: agent_config(agent))
+            cache_nondeterministic: Also cache agents sampling at temperature > 0
+        """
+        self.agent = agent
+        self.cache = cache
+        self.config = config if config is not None else agent_config(agent)
+        self.enabled = cache_nondeterministic or is_deterministic(self.config)
+
+    def run(self, query: str, **kwargs: Any) -> str:
+        """Answer from the cache, or run the agent (kwargs such as callbacks are passed on)."""
+        if not self.enabled:
+            return self.agent.run(query, **kwargs)
+        answer = self.cache.get(query, self.config)
+        if answer is None:
+            answer = self.agent.run(query, **kwargs)
+            self.cache.put(query, self.config, answer)
+        return answer
+
+    async def arun(self, query: str, **kwargs: Any) -> str:
+        if not self.enabled:
+            return await self.agent.arun(query, **kwargs)
+        answer = self.cache.get(query, self.config)
+        if answer is None:
+            answer = await self.agent.arun(query, **kwargs)
+            self.cache.put(query, self.config, answer)
+        return answer
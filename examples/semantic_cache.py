@@ -0,0 +1,189 @@
+"""
+Semantic Response Cache
+Serves cached answers for paraphrased questions ("Calculate 100 divided by
+4" vs "what's 100/4"). Queries are embedded locally with sentence-transformers
+(through the process-wide EmbeddingService, so the model is loaded once and
+concurrent sessions share batches) and compared against an in-process
+vector index; the best match above a similarity threshold is returned.
+
+Each agent configuration gets its own namespace, each namespace keeps at
+most `max_entries` vectors (least recently used are evicted), and hit/miss
+counters are kept per namespace.
+
+Numbers and operators matter more than wording for agents like the
+calculator: "what is 25 * 37", "what is 25 * 38" and "25 plus 37" embed
+almost identically. A hit therefore also requires both queries to contain
+the same numbers and operators in the same order (after operator words are
+translated, so "100 divided by 4" still matches "100/4").
+
+Requirements:
+    pip install sentence-transformers numpy
+
+Usage:
+    cache = SemanticCache(threshold=0.9)
+    agent = CachedAgent(agent, TieredCache([ResponseCache(path), cache]))
+"""
+
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from embedding_service import DEFAULT_MODEL, get_embedding_service
+from fast_path import translate_operators
+
+ARITHMETIC_TOKEN = re.compile(r"\*\*|[-+*/()]|\d+(?:\.\d+)?")
+
+
+def arithmetic_signature(text: str) -> str:
+    """The numbers and operators of a query, in order ("What's -5 times 3?" -> "- 5 * 3")."""
+    return " ".join(ARITHMETIC_TOKEN.findall(translate_operators(text.lower())))
+
+
+def namespace_for(config: Dict[str, Any]) -> str:
+    """Namespace name for an agent configuration."""
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class _Namespace:
+    """Fixed-capacity vector index with LRU eviction."""
+
+    def __init__(self, dimension: int, capacity: int):
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.queries: List[Optional[str]] = [None] * capacity
+        self.answers: List[Optional[str]] = [None] * capacity
+        self.signatures: List[Optional[str]] = [None] * capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class SemanticCache:
+    """In-process semantic cache over sentence-transformers embeddings."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 1000,
+        model_name: str = DEFAULT_MODEL,
+        embed: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+        match_arithmetic: bool = True,
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Vectors kept per namespace
+            model_name: sentence-transformers model (loaded once per process, on first use)
+            embed: Custom embedding function (texts -> 2-D array); overrides model_name
+            match_arithmetic: Require the same numbers and operators in both queries for a hit
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.match_arithmetic = match_arithmetic
+        self._embed = embed
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._clock = 0
+        self._last = (None, None)  # a miss is usually followed by store() of the same query
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 rows."""
+        if self._embed is None:
+            with self._model_lock:
+                if self._embed is None:
+                    # Shared with every other user of the model, and batched with their requests
+                    self._embed = get_embedding_service(self.model_name).embed
+        vectors = np.asarray(self._embed(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        last_query, last_vector = self._last
+        if last_query == query:
+            return last_vector
+        vector = self.embed([query])[0]
+        self._last = (query, vector)
+        return vector
+
+    def _namespace(self, name: str, dimension: int) -> _Namespace:
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = self._namespaces[name] = _Namespace(dimension, self.max_entries)
+        return namespace
+
+    def lookup(self, query: str, namespace: str = "default") -> Optional[str]:
+        """Return the answer of the most similar cached query, or None."""
+        vector = self._embed_query(query)
+        with self._lock:
+            index = self._namespace(namespace, vector.shape[0])
+            if index.size:
+                scores = index.vectors[:index.size] @ vector
+                if self.match_arithmetic:
+                    wanted = arithmetic_signature(query)
+                    for row in np.flatnonzero(scores >= self.threshold):
+                        if index.signatures[row] != wanted:
+                            scores[row] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._clock += 1
+                    index.last_used[best] = self._clock
+                    index.hits += 1
+                    return index.answers[best]
+            index.misses += 1
+            return None
+
+    def store(self, query: str, answer: str, namespace: str = "default") -> None:
+        """Add a query/answer pair, evicting the least recently used entry if full."""
+        vector = self._embed_query(query)
+        with self._lock:
+            index = self._namespace(namespace, vector.shape[0])
+            if index.size < self.max_entries:
+                row = index.size
+                index.size += 1
+            else:
+                row = int(np.argmin(index.last_used))
+                index.evictions += 1
+            self._clock += 1
+            index.vectors[row] = vector
+            index.last_used[row] = self._clock
+            index.queries[row] = query
+            index.answers[row] = answer
+            index.signatures[row] = arithmetic_signature(query)
+
+    # ResponseCache-compatible interface (namespace per agent configuration)
+
+    def get(self, query: str, config: Dict[str, Any]) -> Optional[str]:
+        return self.lookup(query, namespace_for(config))
+
+    def put(self, query: str, config: Dict[str, Any], answer: str) -> None:
+        self.store(query, answer, namespace_for(config))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters, overall and per namespace."""
+        with self._lock:
+            per_namespace = {
+                name: {
+                    "hits": index.hits,
+                    "misses": index.misses,
+                    "hit_rate": round(index.hits / max(1, index.hits + index.misses), 4),
+                    "evictions": index.evictions,
+                    "entries": index.size,
+                }
+                for name, index in self._namespaces.items()
+            }
+        hits = sum(ns["hits"] for ns in per_namespace.values())
+        misses = sum(ns["misses"] for ns in per_namespace.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / max(1, hits + misses), 4),
+            "namespaces": per_namespace,
+        }
@@ -3,26 +3,92 @@ Simple Calculator Agent Example
 This demonstrates a basic agent with a single tool for calculations.
 
 Requirements:
-    pip install langchain openai langchain-openai python-dotenv
+    pip install langchain openai langchain-openai python-dotenv numpy
 
 Usage:
     1. Set OPENAI_API_KEY in .env file
     2. Run: python examples/simple_calculator_agent.py
+
+    Plain arithmetic questions are answered directly by the calculator
+    without calling the LLM; pass --no-fast-path to always use the agent.
+
+    Offline (no API key, no network), against the scripted mock LLM:
+        python examples/simple_calculator_agent.py --mock-llm --no-fast-path --no-interactive
+
+    Run the example queries concurrently (at most 4 in flight):
+        python examples/simple_calculator_agent.py --concurrency 4
+
+    Serve repeated questions from a persistent on-disk response cache:
+        python examples/simple_calculator_agent.py --cache .agent_cache/responses.sqlite
+
+    ... and paraphrases of earlier questions from an in-process semantic cache:
+        python examples/simple_calculator_agent.py --semantic-cache --semantic-threshold 0.9
+
+    Hedge LLM calls slower than the p95 of recent calls (at most 5% extra requests):
+        python examples/simple_calculator_agent.py --hedge --hedge-percentile 95 --hedge-budget 0.05
+
+    Stay under provider limits (queued, shared with other processes via a state file):
+        python examples/simple_calculator_agent.py --rpm 60 --tpm 60000 --rate-limit-state .agent_cache/ratelimits.json
+
+    ... letting the number of LLM calls in flight adapt (AIMD) up to that cap:
+        python examples/simple_calculator_agent.py --concurrency 16 --adaptive-concurrency
+
+    Stream reasoning steps and the answer token by token (with time-to-first-token):
+        python examples/simple_calculator_agent.py --stream --mock-llm --mock-tokens-per-second 30
+
+    End each LLM call as soon as its Action Input is complete, so tools start without waiting for the rest:
+        python examples/simple_calculator_agent.py --early-stop
+
+    Record every LLM and tool call, then replay the run offline at CPU speed:
+        python examples/simple_calculator_agent.py --cassette runs.cassette --cassette-mode record
+        python examples/simple_calculator_agent.py --cassette runs.cassette --cassette-mode replay
 """
 
+import argparse
+import functools
 import os
+import time
+from typing import Optional
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent, AgentType
 from langchain.llms import OpenAI
 from langchain.tools import Tool
 
+from adaptive_limiter import AdaptiveLimitedLLM, AdaptiveLimiter
+from batch_calculator import calculate_batch
+from calc_engine import ExpressionError, evaluate
+from cassette import MODES as CASSETTE_MODES, Cassette, CassetteLLM, wrap_tool
+from concurrent_runner import run_queries_sync
+from fast_path import FastPathRouter
+from hedging import hedged
+from http_pool import get_async_http_client, get_http_client, warm_up
+from mock_llm import ScriptedLLM
+from rate_limiter import rate_limited
+from react_stream import EarlyStopLLM
+from streaming import StreamingPrinter
+from response_cache import CachedAgent, ResponseCache, TieredCache
+from tool_cache import ToolCache, memoize_tool
+
 # Load environment variables
 load_dotenv()
 
+# Example queries
+TEST_QUERIES = [
+    "What is 25 * 37?",
+    "Calculate 100 divided by 4",
+    "What's 15 plus 23 minus 8?",
+    "Compute 2 to the power of 10"
+]
+
 def calculate(expression: str) -> str:
     """
     Safely evaluate a mathematical expression.
     
+    The expression is parsed into a restricted AST and compiled once; repeated
+    expressions are served from the compiled-expression cache. Inputs whose
+    evaluation would blow past the digit/CPU budget (e.g. 9**9**9**9) return
+    a "too expensive" error instead of hanging the agent loop.
+    
     Args:
         expression: A mathematical expression as a string
         
@@ -30,31 +96,27 @@ def calculate(expression: str) -> str:
         The result of the calculation or an error message
     """
     try:
-        # Simple safety check - only allow numbers and basic operators
-        allowed_chars = set('0123456789+-*/(). ')
-        if not all(c in allowed_chars for c in expression):
-            return "Error: Invalid characters in expression"
-        
-        result = eval(expression)
+        result = evaluate(expression)
         return f"Result: {result}"
     except ZeroDivisionError:
         return "Error: Division by zero"
+    except OverflowError:
+        return "Error: Result too large"
+    except ExpressionError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
-    """Main function to run the calculator agent."""
-    
-    # Check for API key
-    if not os.getenv("OPENAI_API_KEY"):
-        print("❌ Error: OPENAI_API_KEY not found in environment variables")
-        print("Please set it in your .env file or export it:")
-        print("  export OPENAI_API_KEY='your-key-here'")
-        return
-    
-    print("🤖 Simple Calculator Agent")
-    print("=" * 50)
+def build_tools(tool_cache: Optional[ToolCache] = None):
+    """
+    Create the calculator tools offered to the agent.
     
+    Args:
+        tool_cache: Memoize tool results here (both tools are pure)
+        
+    Returns:
+        The tools
+    """
     # Create calculator tool
     calc_tool = Tool(
         name="Calculator",
@@ -62,37 +124,321 @@ def main():
         description="Evaluates mathematical expressions. Input should be a valid expression like '2 + 2' or '10 * 5 / 2'"
     )
     
+    # Batch calculator tool - many expressions in a single call
+    batch_calc_tool = Tool(
+        name="Batch Calculator",
+        func=calculate_batch,
+        description=(
+            "Evaluates many mathematical expressions at once. Input is either expressions separated "
+            "by ';' like '25 * 37; 100 / 4; 2 ** 10', or one expression with variables followed by "
+            "'|'-separated value lists like 'x * y + 1 | x = 1, 2, 3 | y = 4, 5, 6'"
+        )
+    )
+    
+    tools = [calc_tool, batch_calc_tool]
+    if tool_cache is not None:
+        tools = [memoize_tool(tool, tool_cache) for tool in tools]
+    return tools
+
+def build_llm(mock: bool = False, latency: float = 0.0, tokens_per_second: float = 0.0, streaming: bool = False):
+    """
+    Create the LLM driving the agent.
+    
+    Args:
+        mock: Use the offline ScriptedLLM instead of OpenAI
+        latency: Mock only - seconds before the first token
+        tokens_per_second: Mock only - generation speed (0 = instant)
+        streaming: Deliver tokens to the run's callbacks as they are generated
+        
+    Returns:
+        The LLM instance
+    """
+    if mock:
+        return ScriptedLLM(latency=latency, tokens_per_second=tokens_per_second, streaming=streaming)
+    
     # Initialize LLM (using older OpenAI class for compatibility)
     # For newer versions, use: from langchain_openai import ChatOpenAI
-    llm = OpenAI(temperature=0)  # temperature=0 for deterministic results
+    # The pooled clients keep connections open across agents and requests;
+    # the async one serves agent.arun (--concurrency), all on one event loop.
+    # langchain's OpenAI hands a single http_client to both the sync and the
+    # async SDK client, so the SDK clients are built here instead
+    import openai
+    return OpenAI(
+        temperature=0,  # temperature=0 for deterministic results
+        streaming=streaming,
+        client=openai.OpenAI(http_client=get_http_client("openai")).completions,
+        async_client=openai.AsyncOpenAI(http_client=get_async_http_client("openai")).completions
+    )
+
+def build_agent(
+    llm,
+    verbose: bool = True,
+    cassette: Optional[Cassette] = None,
+    tool_cache: Optional[ToolCache] = None
+):
+    """
+    Initialize the calculator agent around an LLM.
     
-    # Initialize agent
-    agent = initialize_agent(
-        tools=[calc_tool],
+    Args:
+        llm: The LLM driving the agent (may be None when replaying a cassette)
+        verbose: Print the agent's reasoning process
+        cassette: Record/replay every LLM and tool call through this cassette
+        tool_cache: Memoize tool results here
+        
+    Returns:
+        The agent
+    """
+    tools = build_tools(tool_cache)
+    if cassette is not None:
+        llm = CassetteLLM(inner=llm, cassette=cassette)
+        tools = [wrap_tool(tool, cassette) for tool in tools]
+    
+    return initialize_agent(
+        tools=tools,
         llm=llm,
         agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-        verbose=True  # Set to False to hide reasoning process
+        verbose=verbose  # Set to False to hide reasoning process
+    )
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Simple Calculator Agent")
+    parser.add_argument(
+        "--no-fast-path",
+        action="store_true",
+        help="Send every query through the agent, even plain arithmetic"
+    )
+    parser.add_argument(
+        "--mock-llm",
+        action="store_true",
+        help="Run offline against the scripted mock LLM (no API key needed)"
+    )
+    parser.add_argument(
+        "--mock-latency",
+        type=float,
+        default=0.0,
+        help="Mock LLM: seconds before the first token"
+    )
+    parser.add_argument(
+        "--mock-tokens-per-second",
+        type=float,
+        default=0.0,
+        help="Mock LLM: generation speed (0 = instant)"
+    )
+    parser.add_argument(
+        "--cassette",
+        metavar="PATH",
+        help="Record/replay LLM and tool calls to/from this cassette file"
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        choices=CASSETTE_MODES,
+        default="auto",
+        help="record: always call through, replay: offline only, auto: replay or record on a miss"
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="Cache answers in this SQLite file (temperature=0 agents only)"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=None,
+        help="Seconds before a cached answer expires (default: never)"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests per minute allowed to the LLM provider (default: unlimited)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens per minute allowed to the LLM provider (default: unlimited)"
+    )
+    parser.add_argument(
+        "--rate-limit-state",
+        help="Share the RPM/TPM limits with other processes through this state file"
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate LLM request when a call is slower than usual; first answer wins"
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=95.0,
+        help="Hedge calls slower than this percentile of recent LLM latencies"
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.05,
+        help="Maximum extra LLM requests as a fraction of all requests"
+    )
+    parser.add_argument(
+        "--tool-cache-size",
+        type=int,
+        default=1024,
+        help="Memoized tool results kept in memory (0 = disabled)"
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Also answer paraphrases of earlier questions (needs sentence-transformers)"
+    )
+    parser.add_argument(
+        "--semantic-threshold",
+        type=float,
+        default=0.9,
+        help="Minimum cosine similarity for a semantic cache hit"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Run the example queries concurrently, at most this many at a time"
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        action="store_true",
+        help="Adapt LLM calls in flight (AIMD) between 1 and --concurrency"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print reasoning steps and answers token by token (sequential runs only)"
+    )
+    parser.add_argument(
+        "--early-stop",
+        action="store_true",
+        help="Stop each LLM call once its action is complete and run the tool right away"
+    )
+    parser.add_argument(
+        "--no-interactive",
+        action="store_true",
+        help="Exit after the example queries"
     )
+    return parser.parse_args()
+
+def main():
+    """Main function to run the calculator agent."""
+    args = parse_args()
+    
+    try:
+        cassette = Cassette(args.cassette, args.cassette_mode) if args.cassette else None
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}")
+        return
+    replaying = cassette is not None and cassette.mode == "replay"
+    
+    # Check for API key
+    if not args.mock_llm and not replaying and not os.getenv("OPENAI_API_KEY"):
+        print("❌ Error: OPENAI_API_KEY not found in environment variables")
+        print("Please set it in your .env file or export it:")
+        print("  export OPENAI_API_KEY='your-key-here'")
+        print("Or run offline with --mock-llm")
+        return
     
-    # Example queries
-    test_queries = [
-        "What is 25 * 37?",
-        "Calculate 100 divided by 4",
-        "What's 15 plus 23 minus 8?",
-        "Compute 2 to the power of 10"
-    ]
+    print("🤖 Simple Calculator Agent")
+    print("=" * 50)
+    
+    # Open the provider connection while the agent is being built
+    if not args.mock_llm and not replaying:
+        warm_up("openai")
+    
+    # Streamed tokens of concurrent queries would interleave, so only stream sequential runs
+    streaming = args.stream and args.concurrency <= 1
+    llm = None if replaying else build_llm(args.mock_llm, args.mock_latency, args.mock_tokens_per_second, streaming)
+    # Innermost, so the provider's stream itself is closed at the cut
+    early_stop_llm = None
+    if llm is not None and args.early_stop:
+        llm = early_stop_llm = EarlyStopLLM(inner=llm)
+    # Grow LLM calls in flight while the provider is healthy, back off on 429s and latency spikes
+    # (inside the rate limiter, so queueing for RPM/TPM capacity is not mistaken for provider latency)
+    limiter = None
+    if llm is not None and args.adaptive_concurrency and args.concurrency > 1:
+        limiter = AdaptiveLimiter(initial=min(4, args.concurrency), max_limit=args.concurrency)
+        llm = AdaptiveLimitedLLM(inner=llm, limiter=limiter)
+    rate_limiter = None
+    if llm is not None and (args.rpm or args.tpm):
+        llm = rate_limited(llm, "openai", args.rpm, args.tpm, args.rate_limit_state)
+        rate_limiter = llm.limiter
+    # Hedged duplicates go through the rate limiter too (and would both stream, so not when streaming)
+    if llm is not None and args.hedge and not streaming:
+        llm = hedged(llm, percentile=args.hedge_percentile, budget=args.hedge_budget)
+    # Repeated tool steps (within and across queries) are answered from memory
+    tool_cache = ToolCache(args.tool_cache_size) if args.tool_cache_size > 0 else None
+    # Reasoning traces of concurrent queries would interleave, so only show them sequentially
+    verbose = args.concurrency <= 1 and not streaming
+    agent = build_agent(llm, verbose=verbose, cassette=cassette, tool_cache=tool_cache)
+    
+    # Repeated (and, optionally, paraphrased) questions skip the LLM entirely
+    tiers = []
+    if args.cache:
+        tiers.append(ResponseCache(args.cache, ttl_seconds=args.cache_ttl))
+    if args.semantic_cache:
+        from semantic_cache import SemanticCache
+        tiers.append(SemanticCache(threshold=args.semantic_threshold))
+    response_cache = TieredCache(tiers) if tiers else None
+    if response_cache is not None:
+        agent = CachedAgent(agent, response_cache)
+    
+    agent_run, agent_arun = agent.run, agent.arun
+    printer = None
+    if streaming:
+        printer = StreamingPrinter()
+        agent_run = functools.partial(agent.run, callbacks=[printer])
+    
+    # Answer plain arithmetic directly, fall back to the agent otherwise
+    router = FastPathRouter(agent_run, calculate, enabled=not args.no_fast_path, agent_arun=agent_arun)
     
     print("\n📝 Running example queries:\n")
     
-    for i, query in enumerate(test_queries, 1):
-        print(f"\n{'='*50}")
-        print(f"Example {i}: {query}")
-        print('-'*50)
-        try:
-            response = agent.run(query)
-            print(f"\n✅ Answer: {response}\n")
-        except Exception as e:
-            print(f"❌ Error: {str(e)}\n")
+    if args.concurrency > 1:
+        start = time.perf_counter()
+        results = run_queries_sync(router.arun, TEST_QUERIES, args.concurrency)
+        elapsed = time.perf_counter() - start
+        for i, result in enumerate(results, 1):
+            print(f"\n{'='*50}")
+            print(f"Example {i}: {result.query} ({result.seconds:.2f}s)")
+            print('-'*50)
+            if result.ok:
+                print(f"\n✅ Answer: {result.answer}\n")
+            else:
+                print(f"❌ Error: {str(result.error)}\n")
+        print(f"⏱️  {len(results)} queries in {elapsed:.2f}s with concurrency {args.concurrency}")
+    else:
+        for i, query in enumerate(TEST_QUERIES, 1):
+            print(f"\n{'='*50}")
+            print(f"Example {i}: {query}")
+            print('-'*50)
+            try:
+                response = router.run(query)
+                print(f"\n✅ Answer: {response}\n")
+            except Exception as e:
+                print(f"❌ Error: {str(e)}\n")
+    
+    print(router.summary())
+    if response_cache is not None:
+        print(f"💾 Response cache: {response_cache.stats()}")
+    if tool_cache is not None:
+        print(f"🧰 Tool cache: {tool_cache.stats()}")
+    if args.hedge and llm is not None and not streaming:
+        print(f"🏁 Hedging: {llm.hedger.stats()}")
+    if printer is not None:
+        print(f"⚡ Time to first token: {printer.timer.summary()}")
+    if early_stop_llm is not None:
+        print(f"✂️  Early stop: {early_stop_llm.stats()}")
+    if rate_limiter is not None:
+        print(f"🚦 Rate limiter: {rate_limiter.stats()}")
+    if limiter is not None:
+        print(f"🎚️  Adaptive concurrency: {limiter.stats()}")
+    
+    if args.no_interactive:
+        return
     
     # Interactive mode
     print("\n" + "="*50)
@@ -112,7 +458,7 @@ def main():
                 continue
             
             print()
-            response = agent.run(user_input)
+            response = router.run(user_input)
             print(f"\n🤖 Agent: {response}\n")
             
         except KeyboardInterrupt:
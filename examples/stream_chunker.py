@@ -0,0 +1,171 @@
+"""
+Streaming Loader and Chunker for Large Documents
+Splits files of any size into the same chunks as
+
+    CharacterTextSplitter(separator, chunk_size, chunk_overlap).split_text(TextLoader(path).load()[0].page_content)
+
+in one linear pass and constant memory. The file is memory-mapped and
+decoded block by block (with the same newline translation as reading it in
+text mode, so CRLF files match too); splits are merged into chunks as they
+arrive, using the same algorithm as LangChain's TextSplitter._merge_splits,
+and chunks are yielded as soon as they are complete.
+
+Memory use is bounded by the block size plus one chunk - except for a run
+of text without any separator, which, as with CharacterTextSplitter, is
+kept whole.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    splitter = StreamingSplitter(chunk_size=1000, chunk_overlap=0)
+    for batch in batched(splitter.split_file("export.log"), 64):
+        vectorstore.add_texts(batch)
+"""
+
+import codecs
+import collections
+import io
+import logging
+import mmap
+import os
+from typing import Callable, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def iter_file_text(path: str, encoding: str = "utf-8", block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Decode a file piece by piece through a memory map.
+
+    Newlines are translated as open(path, encoding=encoding) does, so the
+    pieces join to exactly what TextLoader would load.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Pages already decoded are dropped from the process (they stay in the page cache)
+            release = hasattr(mapped, "madvise") and hasattr(mmap, "MADV_DONTNEED") and block_size % mmap.PAGESIZE == 0
+            for start in range(0, len(mapped), block_size):
+                text = decoder.decode(mapped[start:start + block_size])
+                if release:
+                    mapped.madvise(mmap.MADV_DONTNEED, start, min(block_size, len(mapped) - start))
+                if text:
+                    yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group items into lists of at most `size`."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StreamingSplitter:
+    """CharacterTextSplitter that consumes and produces text incrementally."""
+
+    def __init__(
+        self,
+        separator: str = "\n\n",
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
+        strip_whitespace: bool = True,
+    ):
+        """
+        Args:
+            separator: Literal separator (regex separators and keep_separator are not supported)
+            chunk_size: Maximum chunk length
+            chunk_overlap: Length shared by neighbouring chunks
+            length_function: How chunk length is measured
+            strip_whitespace: Strip whitespace around chunks
+        """
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        self.separator = separator
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
+        self.strip_whitespace = strip_whitespace
+
+    def iter_splits(self, pieces: Iterable[str]) -> Iterator[str]:
+        """The non-empty pieces between separators, as re.split() would find them."""
+        separator = self.separator
+        if not separator:
+            for piece in pieces:
+                yield from piece
+            return
+
+        pending = ""
+        for piece in pieces:
+            # Only the tail of what was pending can start a separator that ends in this piece
+            search_from = max(0, len(pending) - len(separator) + 1)
+            pending += piece
+            start = 0
+            index = pending.find(separator, search_from)
+            while index != -1:
+                if index > start:
+                    yield pending[start:index]
+                start = index + len(separator)
+                index = pending.find(separator, start)
+            pending = pending[start:]
+        if pending:
+            yield pending
+
+    def _join(self, splits: Iterable[str]) -> str:
+        text = self.separator.join(splits)
+        return text.strip() if self.strip_whitespace else text
+
+    def merge_splits(self, splits: Iterable[str]) -> Iterator[str]:
+        """Combine splits into chunks, exactly like TextSplitter._merge_splits."""
+        separator_len = self.length_function(self.separator)
+        current = collections.deque()
+        total = 0
+        for split in splits:
+            length = self.length_function(split)
+            if total + length + (separator_len if current else 0) > self.chunk_size:
+                if total > self.chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d", total, self.chunk_size
+                    )
+                if current:
+                    chunk = self._join(current)
+                    if chunk:
+                        yield chunk
+                    # Drop splits from the front until only the overlap is left
+                    while total > self.chunk_overlap or (
+                        total + length + (separator_len if current else 0) > self.chunk_size and total > 0
+                    ):
+                        total -= self.length_function(current[0]) + (separator_len if len(current) > 1 else 0)
+                        current.popleft()
+            current.append(split)
+            total += length + (separator_len if len(current) > 1 else 0)
+        chunk = self._join(current)
+        if chunk:
+            yield chunk
+
+    def split_pieces(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Chunks of a text that arrives in pieces."""
+        return self.merge_splits(self.iter_splits(pieces))
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunks of a whole text (same result as CharacterTextSplitter.split_text)."""
+        return list(self.split_pieces([text]))
+
+    def split_file(self, path: str, encoding: str = "utf-8", block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[str]:
+        """Chunks of a text file, read through a memory map."""
+        return self.split_pieces(iter_file_text(path, encoding, block_size))
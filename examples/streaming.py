@@ -0,0 +1,247 @@
+"""
+Token Streaming for Agents
+Callback handlers that show an agent's ReAct steps and final answer token by
+token as the LLM produces them, instead of all at once when agent.run
+returns - plus time-to-first-token (TTFT) instrumentation:
+
+    first token   - query start -> first token of any LLM call
+    first answer  - query start -> first token of the "Final Answer:"
+    llm call TTFT - LLM call start -> its first token, per call
+
+The LLM must stream: OpenAI(streaming=True) or ScriptedLLM(streaming=True).
+Handlers are passed per run, so one (cached) agent can serve several
+sessions at once.
+
+Requirements:
+    pip install langchain
+
+Usage:
+    printer = StreamingPrinter()
+    agent.run("What is 25 * 37?", callbacks=[printer])
+    print(printer.timer.summary())
+
+    # Streamlit
+    handler = StreamlitStreamHandler(st.empty(), st.empty())
+    agent.run(question, callbacks=[handler])
+"""
+
+import inspect
+import math
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain.callbacks.base import AsyncCallbackHandler, BaseCallbackHandler
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+def _percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1]
+
+
+class StreamTimer:
+    """Collects first-token latencies across queries and LLM calls."""
+
+    def __init__(self):
+        self.first_token: List[float] = []
+        self.first_answer_token: List[float] = []
+        self.llm_call_ttft: List[float] = []
+        self.total: List[float] = []
+        self._query_start: Optional[float] = None
+        self._query_first_token: Optional[float] = None
+        self._query_first_answer: Optional[float] = None
+        self._call_starts: Dict[Any, float] = {}
+
+    def start_query(self) -> None:
+        self._query_start = time.perf_counter()
+        self._query_first_token = None
+        self._query_first_answer = None
+        self._call_starts.clear()
+
+    def end_query(self) -> None:
+        if self._query_start is not None:
+            self.total.append(time.perf_counter() - self._query_start)
+            self._query_start = None
+
+    def llm_started(self, run_id: Any) -> None:
+        self._call_starts[run_id] = time.perf_counter()
+
+    def token(self, run_id: Any, in_answer: bool) -> None:
+        now = time.perf_counter()
+        started = self._call_starts.pop(run_id, None)
+        if started is not None:
+            self.llm_call_ttft.append(now - started)
+        if self._query_start is None:
+            return
+        if self._query_first_token is None:
+            self._query_first_token = now
+            self.first_token.append(now - self._query_start)
+        if in_answer and self._query_first_answer is None:
+            self._query_first_answer = now
+            self.first_answer_token.append(now - self._query_start)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """p50/p95 (ms) of each latency."""
+        result = {}
+        for name, samples in (("first_token", self.first_token), ("first_answer_token", self.first_answer_token),
+                              ("llm_call_ttft", self.llm_call_ttft), ("total", self.total)):
+            for p in (50, 95):
+                value = _percentile(samples, p)
+                result[f"{name}_p{p}_ms"] = None if value is None else round(value * 1e3, 1)
+        return result
+
+
+class StreamHandler(BaseCallbackHandler):
+    """
+    Base handler: splits each LLM call's tokens into reasoning and answer
+    text and feeds the timer. Subclasses render on_text_token().
+    """
+
+    def __init__(self, timer: Optional[StreamTimer] = None):
+        self.timer = timer or StreamTimer()
+        self._buffer = ""
+        self._in_answer = False
+        self._depth = 0
+
+    # Query boundaries (outermost chain only)
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], **kwargs: Any) -> None:
+        if self._depth == 0:
+            self.timer.start_query()
+        self._depth += 1
+
+    def on_chain_end(self, outputs: Dict[str, Any], **kwargs: Any) -> None:
+        self._depth = max(0, self._depth - 1)
+        if self._depth == 0:
+            self.timer.end_query()
+
+    def on_chain_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.on_chain_end({}, **kwargs)
+
+    # LLM calls
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self.timer.llm_started(kwargs.get("run_id"))
+        self._buffer = ""
+        self._in_answer = False
+        self.on_llm_call_start()
+
+    def on_llm_call_start(self) -> None:
+        """A new (outermost) LLM call begins."""
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._buffer += token
+        if not self._in_answer and FINAL_ANSWER_MARKER in self._buffer:
+            self._in_answer = True
+            # The marker may arrive split across tokens; hand over the answer part only
+            before, answer = self._buffer.split(FINAL_ANSWER_MARKER, 1)
+            self.on_text_token(token[:max(0, len(token) - len(answer))], in_answer=False)
+            token = answer
+        if token.strip():
+            self.timer.token(kwargs.get("run_id"), self._in_answer)
+        self.on_text_token(token, in_answer=self._in_answer)
+
+    def on_text_token(self, text: str, in_answer: bool) -> None:
+        """Render a piece of reasoning (in_answer=False) or answer text."""
+
+    def on_tool_end(self, output: str, **kwargs: Any) -> None:
+        self.on_text_token(f"\nObservation: {output}\n", in_answer=False)
+
+
+class TokenForwarder(BaseCallbackHandler):
+    """Re-emits an inner LLM's tokens on the run of the LLM wrapping it."""
+
+    def __init__(self, run_manager: Any):
+        self.run_manager = run_manager
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.run_manager.on_llm_new_token(token, chunk=kwargs.get("chunk"))
+
+
+class AsyncTokenForwarder(AsyncCallbackHandler):
+    """TokenForwarder for the async run manager of a wrapper's _acall."""
+
+    def __init__(self, run_manager: Any):
+        self.run_manager = run_manager
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self.run_manager.on_llm_new_token(token, chunk=kwargs.get("chunk"))
+
+
+def forward_tokens(run_manager: Optional[Any]) -> Optional[List[BaseCallbackHandler]]:
+    """
+    Callbacks for a wrapper LLM (rate limiter, cassette) to pass to the LLM it
+    wraps, so streamed tokens reach the handlers of the agent run.
+    """
+    if run_manager is None:
+        return None
+    if inspect.iscoroutinefunction(run_manager.on_llm_new_token):
+        return [AsyncTokenForwarder(run_manager)]
+    return [TokenForwarder(run_manager)]
+
+
+class StreamingPrinter(StreamHandler):
+    """Prints reasoning steps and the answer to the terminal as they stream."""
+
+    def __init__(self, timer: Optional[StreamTimer] = None, stream=None):
+        super().__init__(timer)
+        self.stream = stream or sys.stdout
+
+    def on_llm_call_start(self) -> None:
+        self.stream.write("\n💭")
+        self.stream.flush()
+
+    def on_text_token(self, text: str, in_answer: bool) -> None:
+        if text:
+            self.stream.write(text)
+            self.stream.flush()
+
+    def on_chain_end(self, outputs: Dict[str, Any], **kwargs: Any) -> None:
+        super().on_chain_end(outputs, **kwargs)
+        if self._depth == 0:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+class StreamlitStreamHandler(StreamHandler):
+    """
+    Renders streaming reasoning and answer into two Streamlit placeholders
+    (e.g. st.empty()). Redraws are throttled to keep the websocket quiet.
+    """
+
+    def __init__(self, steps_placeholder, answer_placeholder, timer: Optional[StreamTimer] = None,
+                 min_interval: float = 0.05):
+        super().__init__(timer)
+        self.steps_placeholder = steps_placeholder
+        self.answer_placeholder = answer_placeholder
+        self.min_interval = min_interval
+        self.steps = ""
+        self.answer = ""
+        self._last_draw = 0.0
+
+    def on_llm_call_start(self) -> None:
+        self.answer = ""
+
+    def on_text_token(self, text: str, in_answer: bool) -> None:
+        if in_answer:
+            self.answer += text
+        else:
+            self.steps += text
+        now = time.perf_counter()
+        if now - self._last_draw >= self.min_interval or "\n" in text:
+            self.draw()
+            self._last_draw = now
+
+    def draw(self) -> None:
+        if self.steps:
+            self.steps_placeholder.code(self.steps.strip(), language="text")
+        if self.answer:
+            self.answer_placeholder.markdown(f"**Answer:** {self.answer.strip()}")
+
+    def on_chain_end(self, outputs: Dict[str, Any], **kwargs: Any) -> None:
+        super().on_chain_end(outputs, **kwargs)
+        self.draw()
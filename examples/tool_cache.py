@@ -0,0 +1,180 @@
+"""
+Tool Result Memoization
+Wraps LangChain tools so repeated calls with the same input are answered from
+an in-memory cache instead of running the tool again. ReAct agents often
+repeat a step within one trajectory (and across sessions sharing the cache),
+and every repeat then costs a dictionary lookup.
+
+Tools opt in explicitly:
+
+    pure - the result depends only on the input (calculator); never expires
+    ttl  - the result may change over time (web search); expires after ttl_seconds
+
+File readers are keyed by path plus modification time and size (file_key),
+so an edited file is read again while an unchanged one is not.
+
+The cache is a bounded LRU shared by all wrapped tools, with hit/miss
+counters per tool. Calls that raise are never cached.
+
+Usage:
+    cache = ToolCache(max_entries=1024)
+    calc_tool = memoize_tool(calc_tool, cache)
+    file_tool = memoize_tool(file_tool, cache, key=file_key)
+    search_tool = memoize_tool(search_tool, cache, policy="ttl", ttl_seconds=600)
+    print(cache.stats())
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from langchain.tools import Tool
+
+POLICIES = ("pure", "ttl")
+
+_MISSING = object()
+
+
+def input_key(tool_input: str) -> str:
+    """Default key: the tool input without surrounding whitespace."""
+    return tool_input.strip()
+
+
+def file_key(tool_input: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Key a file path by its resolved location, mtime and size.
+
+    Returns None (do not cache) when the file cannot be stat'ed, so the
+    tool reports its own error.
+    """
+    path = os.path.realpath(os.path.expanduser(tool_input.strip().strip("'\"")))
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class ToolCache:
+    """Thread-safe LRU cache of tool results with optional per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Least recently used results beyond this are evicted
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._counters: Dict[str, list] = {}  # tool name -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def get(self, tool_name: str, key: Hashable) -> Any:
+        """Return the cached result, or the _MISSING sentinel."""
+        with self._lock:
+            counters = self._counters.setdefault(tool_name, [0, 0])
+            entry = self._entries.get((tool_name, key))
+            if entry is not None:
+                value, expires = entry
+                if expires is None or time.monotonic() < expires:
+                    self._entries.move_to_end((tool_name, key))
+                    counters[0] += 1
+                    return value
+                del self._entries[(tool_name, key)]
+                self.expirations += 1
+            counters[1] += 1
+            return _MISSING
+
+    def put(self, tool_name: str, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a result, evicting the least recently used one if full."""
+        expires = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._entries[(tool_name, key)] = (value, expires)
+            self._entries.move_to_end((tool_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters (overall and per tool), evictions and size."""
+        with self._lock:
+            tools = {
+                name: {"hits": hits, "misses": misses, "hit_rate": round(hits / max(1, hits + misses), 4)}
+                for name, (hits, misses) in self._counters.items()
+            }
+            hits = sum(tool["hits"] for tool in tools.values())
+            misses = sum(tool["misses"] for tool in tools.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / max(1, hits + misses), 4),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "tools": tools,
+            }
+
+
+def memoize_tool(
+    tool: Tool,
+    cache: ToolCache,
+    policy: str = "pure",
+    ttl_seconds: Optional[float] = None,
+    key: Callable[[str], Optional[Hashable]] = input_key,
+) -> Tool:
+    """
+    Return a copy of a tool whose results are memoized in cache.
+
+    Args:
+        tool: The tool to wrap
+        cache: Shared result cache
+        policy: "pure" (never expires) or "ttl" (expires after ttl_seconds)
+        ttl_seconds: Lifetime of a result under the "ttl" policy
+        key: Maps the tool input to a cache key; returning None skips the cache
+
+    Returns:
+        A Tool with the same name and description
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy: {policy} (expected one of: {', '.join(POLICIES)})")
+    if (policy == "ttl" and not ttl_seconds) or (policy == "pure" and ttl_seconds is not None):
+        raise ValueError("ttl_seconds is required for (and only valid with) the 'ttl' policy")
+
+    def func(tool_input: str) -> str:
+        cache_key = key(tool_input)
+        if cache_key is None:
+            return tool.run(tool_input)
+        result = cache.get(tool.name, cache_key)
+        if result is _MISSING:
+            result = tool.run(tool_input)
+            cache.put(tool.name, cache_key, result, ttl_seconds)
+        return result
+
+    async def coroutine(tool_input: str) -> str:
+        cache_key = key(tool_input)
+        if cache_key is None:
+            return await tool.arun(tool_input)
+        result = cache.get(tool.name, cache_key)
+        if result is _MISSING:
+            result = await tool.arun(tool_input)
+            cache.put(tool.name, cache_key, result, ttl_seconds)
+        return result
+
+    return Tool(
+        name=tool.name,
+        func=func,
+        coroutine=coroutine if getattr(tool, "coroutine", None) is not None else None,
+        description=tool.description,
+    )
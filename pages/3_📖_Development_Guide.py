@@ -113,12 +113,35 @@ search_tool = Tool(
     description="Search the web for current information"
 )
 
-# Calculator Tool
+# Calculator Tool (never eval() model output - parse it into a restricted AST)
+import ast
+import operator
+
+def safe_pow(base, exponent):
+    # Refuse powers like 9**9**9**9 that would pin a CPU core for minutes
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1:
+        if abs(exponent) * base.bit_length() > 4000:  # ~1200 digits
+            raise ValueError("Expression too expensive to evaluate")
+    return operator.pow(base, exponent)
+
+OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub,
+             ast.Mult: operator.mul, ast.Div: operator.truediv,
+             ast.Pow: safe_pow, ast.USub: operator.neg}
+
+def _evaluate(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](_evaluate(node.left), _evaluate(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](_evaluate(node.operand))
+    raise ValueError("Unsupported expression")
+
 def calculate(expression: str) -> str:
     try:
-        result = eval(expression)
+        result = _evaluate(ast.parse(expression, mode="eval").body)
         return str(result)
-    except:
+    except Exception:
         return "Error calculating"
 
 calc_tool = Tool(
@@ -137,6 +160,15 @@ file_tool = Tool(
     func=read_file,
     description="Read contents of a text file"
 )
+
+# Memoize deterministic tools so repeated steps are free (examples/tool_cache.py)
+from tool_cache import ToolCache, file_key, memoize_tool
+
+tool_cache = ToolCache(max_entries=1024)
+calc_tool = memoize_tool(calc_tool, tool_cache)                   # pure: never expires
+file_tool = memoize_tool(file_tool, tool_cache, key=file_key)     # keyed by path + mtime
+search_tool = memoize_tool(search_tool, tool_cache, policy="ttl", ttl_seconds=600)
+print(tool_cache.stats())  # hits / misses per tool, evictions
 ```
 """)
 
@@ -156,9 +188,14 @@ memory = ConversationBufferMemory(
     return_messages=True
 )
 
+# Let the agent batch independent lookups into one step: the calls run
+# concurrently, each with its own timeout, and return one observation
+from parallel_tools import ParallelToolRunner  # examples/parallel_tools.py
+runner = ParallelToolRunner([search_tool, calc_tool, file_tool], timeouts={"Search": 5.0})
+
 # Initialize agent with tools
 agent = initialize_agent(
-    tools=[search_tool, calc_tool, file_tool],
+    tools=[search_tool, calc_tool, file_tool, runner.as_tool()],
     llm=llm,
     agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
     memory=memory,
@@ -198,24 +235,28 @@ st.subheader("Step 6: Implement Error Handling")
 st.markdown("""
 ```python
 import logging
-import time
-from typing import Optional
-
-def safe_agent_run(agent, query: str, max_retries: int = 3) -> Optional[str]:
-    # Run agent with error handling and retries
-    for attempt in range(max_retries):
-        try:
-            response = agent.run(query)
-            return response
-        except Exception as e:
-            logging.error(f"Attempt {attempt + 1} failed: {str(e)}")
-            if attempt == max_retries - 1:
-                return f"Error: Unable to process query after {max_retries} attempts"
-            time.sleep(1)  # Wait before retry
-    return None
+from resilience import CircuitOpenError, DeadlineExceeded, RetryPolicy, get_breaker  # examples/resilience.py
+
+# Retry only what can succeed next time (429, timeouts, 5xx) - never auth or
+# bad-request errors - with jittered backoff, honoring Retry-After, inside an
+# overall deadline. The breaker is shared by every caller of the provider.
+policy = RetryPolicy(max_attempts=3, deadline=30.0, breaker=get_breaker("openai"))
+
+def safe_agent_run(agent, query: str) -> str:
+    # Run agent with classified retries, a deadline and a circuit breaker
+    try:
+        return policy.call(agent.run, query)
+    except CircuitOpenError:
+        return "Error: Service temporarily unavailable, please try again shortly"
+    except DeadlineExceeded:
+        return "Error: The request took too long"
+    except Exception as e:
+        logging.error(f"Query failed: {str(e)}")
+        return f"Error: Unable to process query ({type(e).__name__})"
 
 # Usage
 result = safe_agent_run(agent, user_query)
+print(policy.stats())  # attempts, retries, Retry-After waits, breaker state
 ```
 """)
 
@@ -4,9 +4,68 @@ Examples Page: Working Agent Implementations
 
 import streamlit as st
 import os
+import sys
+import time
 from typing import Optional
 
+# Runnable helpers live next to the example scripts
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(ROOT_DIR, "examples")
+if EXAMPLES_DIR not in sys.path:
+    sys.path.insert(0, EXAMPLES_DIR)
+
+# Answers of deterministic agents are cached on disk across sessions
+RESPONSE_CACHE_PATH = os.path.join(ROOT_DIR, ".agent_cache", "responses.sqlite")
+
+# Provider limits shared by every session (and every Streamlit process on this machine)
+RATE_LIMIT_STATE_PATH = os.path.join(ROOT_DIR, ".agent_cache", "ratelimits.json")
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "60"))
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "60000"))
+
+
+@st.cache_resource
+def get_semantic_cache():
+    """One semantic cache (and embedding model) shared by every session."""
+    from semantic_cache import SemanticCache
+    return SemanticCache(threshold=0.9)
+
+
+@st.cache_resource
+def get_response_cache():
+    """One on-disk response cache (and SQLite connection) shared by every session."""
+    from response_cache import ResponseCache
+    return ResponseCache(RESPONSE_CACHE_PATH, ttl_seconds=24 * 3600)
+
+
+@st.cache_resource
+def get_calculator_agent(use_mock: bool):
+    """
+    Build the calculator agent once per configuration and reuse it across
+    reruns and sessions. The real LLM talks through the process-wide pooled
+    HTTP client, so its connections stay open between requests, and streams
+    tokens to whatever callbacks each run passes in.
+    """
+    from rate_limiter import rate_limited
+    from simple_calculator_agent import build_agent, build_llm
+
+    # Sessions queue for the provider's shared RPM/TPM budget instead of hitting 429s
+    llm = rate_limited(
+        build_llm(mock=use_mock, latency=0.2, tokens_per_second=40, streaming=True), "openai",
+        rpm=OPENAI_RPM, tpm=OPENAI_TPM, state_path=RATE_LIMIT_STATE_PATH
+    )
+    return build_agent(llm, verbose=False), llm.limiter
+
+
+@st.cache_resource
+def warm_up_connections():
+    """Open the provider connection once at startup, before the first question."""
+    if os.getenv("OPENAI_API_KEY"):
+        from http_pool import warm_up
+        warm_up("openai")
+    return True
+
 st.set_page_config(page_title="Agent Examples", page_icon="💡", layout="wide")
+warm_up_connections()
 
 st.title("💡 Agent Examples")
 st.markdown("---")
@@ -32,17 +91,46 @@ with st.expander("🔢 Example 1: Calculator Agent (Simple)", expanded=True):
     code1 = """from langchain.agents import initialize_agent, AgentType
 from langchain.llms import OpenAI
 from langchain.tools import Tool
+from functools import lru_cache
+import ast
+import operator
 import os
 
+def safe_pow(base, exponent):
+    '''Refuse powers like 9**9**9**9 that would pin a CPU core for minutes'''
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1:
+        if abs(exponent) * base.bit_length() > 4000:  # ~1200 digits
+            raise ValueError("Expression too expensive to evaluate")
+    return operator.pow(base, exponent)
+
+# Only numbers and these operators are allowed - no eval()
+OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub,
+    ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.Pow: safe_pow, ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str):
+    '''Parse once into a restricted AST and compile it to a closure'''
+    def build(node):
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return lambda: node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            op, left, right = OPERATORS[type(node.op)], build(node.left), build(node.right)
+            return lambda: op(left(), right())
+        if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            op, operand = OPERATORS[type(node.op)], build(node.operand)
+            return lambda: op(operand())
+        raise ValueError("Invalid expression")
+    return build(ast.parse(expression, mode="eval").body)
+
 # Simple calculator function
 def calculate(expression: str) -> str:
     '''Evaluate a mathematical expression safely'''
     try:
-        # Simple safety check
-        allowed_chars = set('0123456789+-*/(). ')
-        if not all(c in allowed_chars for c in expression):
-            return "Error: Invalid characters"
-        result = eval(expression)
+        # Cached per expression text (whitespace can change meaning: "1 2", "2 * * 3")
+        result = compile_expression(expression.strip())()
         return str(result)
     except Exception as e:
         return f"Error: {str(e)}"
@@ -70,8 +158,47 @@ print(response)
     st.code(code1, language="python")
     
     st.subheader("Try it!")
+    use_mock = st.checkbox(
+        "Use offline mock LLM (no API key or network needed)",
+        value=not os.getenv("OPENAI_API_KEY"),
+        key="calc_mock"
+    )
+    use_semantic_cache = st.checkbox(
+        "Also answer paraphrased questions from the semantic cache (needs sentence-transformers)",
+        value=False,
+        key="calc_semantic"
+    )
     if st.button("Run Calculator Agent Example", key="calc_example"):
-        st.info("💡 To run this example, set your OPENAI_API_KEY and execute the code above.")
+        from resilience import RetryPolicy, get_breaker
+        from response_cache import CachedAgent, TieredCache
+        from streaming import StreamlitStreamHandler
+        
+        # Reasoning steps and the answer appear token by token as the LLM produces them
+        steps_placeholder = st.empty()
+        answer_placeholder = st.empty()
+        handler = StreamlitStreamHandler(steps_placeholder, answer_placeholder)
+        with st.spinner("Running agent..."):
+            try:
+                tiers = [get_response_cache()]
+                if use_semantic_cache:
+                    tiers.append(get_semantic_cache())
+                response_cache = TieredCache(tiers)
+                calculator_agent, limiter = get_calculator_agent(use_mock)
+                agent = CachedAgent(calculator_agent, response_cache)
+                # Bounded retries; fail fast while the provider's shared breaker is open
+                policy = RetryPolicy(max_attempts=3, deadline=20.0, breaker=get_breaker("openai"))
+                start = time.perf_counter()
+                response = policy.call(agent.run, "What is 123 * 456?", callbacks=[handler])
+                answer_placeholder.empty()
+                st.success(f"✅ Answer: {response}")
+                ttft = handler.timer.first_answer_token
+                first_answer = f", first answer token after {ttft[-1]:.2f}s" if ttft else " (cached)"
+                st.caption(f"⏱️ {time.perf_counter() - start:.2f}s total{first_answer}")
+                st.caption(f"💾 Response cache: {response_cache.stats()}")
+                st.caption(f"🔁 Retries: {policy.stats()}")
+                st.caption(f"🚦 Rate limiter: {limiter.stats()}")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
 
 # Example 2: Web Research Agent
 with st.expander("🌐 Example 2: Web Research Agent"):
@@ -131,25 +258,38 @@ with st.expander("📄 Example 3: Document Question-Answering Agent"):
     """)
     
     st.subheader("Code")
-    code3 = """from langchain.document_loaders import TextLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
+    code3 = """from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import Chroma
 from langchain.chains import RetrievalQA
 from langchain.llms import OpenAI
+from embedding_cache import CachedEmbeddings  # examples/embedding_cache.py
+from rag_ingest import IncrementalIndexer  # examples/rag_ingest.py
 import os
 
-# Load and process document
-loader = TextLoader("document.txt")
-documents = loader.load()
-
-# Split into chunks
-text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-texts = text_splitter.split_documents(documents)
-
-# Create embeddings and vector store
-embeddings = OpenAIEmbeddings()
-vectorstore = Chroma.from_documents(texts, embeddings)
+# Persistent vector store; text embedded before (by any document, version
+# or query) is served from the local embedding cache
+embeddings = CachedEmbeddings(OpenAIEmbeddings())
+# Or embed locally on CPU - one shared sentence-transformers model that
+# batches requests from all sessions (examples/embedding_service.py):
+#   from embedding_service import LocalEmbeddings
+#   embeddings = CachedEmbeddings(LocalEmbeddings("all-MiniLM-L6-v2"))
+vectorstore = Chroma(persist_directory=".agent_cache/chroma", embedding_function=embeddings)
+
+# Load, split (chunk_size=1000) and embed - but only documents and chunks
+# that are new or changed since the last run; stale chunks are deleted.
+# Files are streamed through a memory map and embedded in batches, so
+# even multi-GB files ingest in constant memory
+indexer = IncrementalIndexer(
+    vectorstore,
+    ".agent_cache/chroma/manifest.json",
+    chunk_size=1000,
+    chunk_overlap=0,
+    embedding_model=embeddings.model
+)
+# Directories are searched for .txt, .md, .pdf and .docx files; PDF pages
+# and DOCX paragraphs are extracted in parallel worker processes
+print(indexer.index(["document.txt", "docs/"]))  # e.g. {'unchanged': 3, 'chunks_added': 0, ...}
+print(indexer.errors)  # files that could not be read (retried next run)
 
 # Create QA chain
 llm = OpenAI(temperature=0)
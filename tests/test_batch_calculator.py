@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import calc_engine
+from batch_calculator import calculate_batch, evaluate_expressions
+
+
+def scalar(expression):
+    """What calculate() computes for one expression (the value or the exception)."""
+    try:
+        return calc_engine.evaluate(expression)
+    except Exception as e:
+        return e
+
+
+@pytest.fixture
+def scalar_rows(monkeypatch):
+    """Counts rows evaluated on the scalar calc_engine path instead of vectorized."""
+    calls = []
+    evaluate = calc_engine.CompiledExpression.evaluate
+
+    def counting(self, *args, **kwargs):
+        calls.append(self.source)
+        return evaluate(self, *args, **kwargs)
+
+    monkeypatch.setattr(calc_engine.CompiledExpression, "evaluate", counting)
+    return calls
+
+
+def test_matches_calculator():
+    expressions = ["25 * 37", "100 / 4", "15 + 23 - 8", "2 ** 10", "(123 + 456) * 789 / 3", "  25*37  "]
+    assert evaluate_expressions(expressions) == [calc_engine.evaluate(e) for e in expressions]
+
+
+def test_numbers_containing_zeros_are_vectorized(scalar_rows):
+    assert evaluate_expressions(["100 / 4", "2048 + 1", "1024 * 0.5", "10 ** 3"]) == [25.0, 2049, 512.0, 1000]
+    assert scalar_rows == []
+
+
+def test_leading_zero_is_rejected():
+    [result] = evaluate_expressions(["007 + 1"])
+    assert isinstance(result, calc_engine.ExpressionError)
+
+
+def test_complex_intermediate_is_a_row_error():
+    assert calculate_batch("(-8) ** 0.5 // 2; 25 * 37").splitlines() == [
+        "1. (-8) ** 0.5 // 2 -> Error: unsupported operand type(s) for //: 'complex' and 'int'",
+        "2. 25 * 37 -> Result: 925",
+    ]
+    assert calculate_batch("x ** 0.5 // 1 | x = -4, 9").splitlines()[1] == "2. x=9 -> Result: 3.0"
+
+
+@pytest.mark.parametrize("expression", ["2 ** 0.5", "1.1 ** 7.3", "(-2.5) ** 3", "2 ** -3", "17.3 ** 2"])
+def test_powers_match_python(expression):
+    assert evaluate_expressions([expression] * 3) == [scalar(expression)] * 3
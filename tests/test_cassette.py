@@ -0,0 +1,54 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.llms.base import LLM
+
+from cassette import Cassette, CassetteLLM, CassetteMismatchError
+
+
+class EchoLLM(LLM):
+    model_name: str = "echo-1"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> str:
+        self.calls += 1
+        return f"{self.model_name}: {prompt}"
+
+
+def test_replays_without_calling_the_llm(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    with Cassette(path, mode="record") as cassette:
+        assert CassetteLLM(inner=EchoLLM(), cassette=cassette)("2 + 2") == "echo-1: 2 + 2"
+    inner = EchoLLM()
+    with Cassette(path, mode="replay") as cassette:
+        assert CassetteLLM(inner=inner, cassette=cassette)("2 + 2") == "echo-1: 2 + 2"
+        assert CassetteLLM(cassette=cassette)("2 + 2") == "echo-1: 2 + 2"
+    assert inner.calls == 0
+
+
+def test_refuses_a_different_llm(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    with Cassette(path, mode="record") as cassette:
+        CassetteLLM(inner=EchoLLM(), cassette=cassette)("2 + 2")
+    for mode in ("replay", "auto"):
+        with Cassette(path, mode=mode) as cassette:
+            with pytest.raises(CassetteMismatchError):
+                CassetteLLM(inner=EchoLLM(model_name="echo-2"), cassette=cassette)("2 + 2")
+
+
+def test_replaying_a_missing_cassette_does_not_create_it(tmp_path):
+    path = tmp_path / "typo.cassette"
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(path), mode="replay")
+    assert not path.exists()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from embedding_service import EmbeddingService
+
+
+def lengths(texts):
+    return np.array([[float(len(text))] for text in texts])
+
+
+def test_results_follow_each_callers_order():
+    service = EmbeddingService(encode=lengths)
+    assert service.embed(["a", "abc", "ab"], timeout=10).ravel().tolist() == [1.0, 3.0, 2.0]
+    assert service.embed([]).shape == (0, 0)
+
+
+def test_cancelled_requests_do_not_stall_the_service():
+    service = EmbeddingService(encode=lengths)
+
+    async def cancel_one():
+        task = asyncio.ensure_future(service.aembed(["cancelled before it is embedded"]))
+        await asyncio.sleep(0)  # queued
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_one())
+    for _ in range(20):
+        service.submit(["cancelled while queued"]).cancel()
+        assert service.embed(["still served"], timeout=10).shape == (1, 1)
+
+
+def test_timed_out_request_is_dropped():
+    release = threading.Event()
+    encoded = []
+
+    def blocking(texts):
+        release.wait(10)
+        encoded.extend(texts)
+        return lengths(texts)
+
+    service = EmbeddingService(encode=blocking, max_batch_size=1)
+    busy = service.submit(["keeps the worker busy"])
+    with pytest.raises(FutureTimeoutError):
+        service.embed(["timed out"], timeout=0.05)
+    release.set()
+    busy.result(10)
+    assert service.embed(["next"], timeout=10).shape == (1, 1)
+    assert "timed out" not in encoded
@@ -0,0 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from fast_path import FastPathRouter
+
+
+def calculator(expression):
+    return "Result: 4"
+
+
+def test_counters_are_exact_under_threads():
+    router = FastPathRouter(agent_run=lambda query: "agent", calculator=calculator)
+    queries = ["What is 2 + 2?", "Tell me a joke"] * 2000
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        answers = list(pool.map(router.run, queries))
+    assert answers[:2] == ["2 + 2 = 4", "agent"]
+    assert (router.fast_queries, router.agent_queries) == (2000, 2000)
+    assert router.summary().startswith("⚡ Fast path: 2000/4000 queries (50%)")
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from hedging import Hedger
+
+
+def test_cancelling_the_caller_cancels_the_primary():
+    hedger = Hedger(min_samples=1, min_delay=10.0)
+    hedger.record(0.01)
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        task = asyncio.ensure_future(hedger.acall(slow))
+        await asyncio.sleep(0.05)  # waiting for the hedge delay
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from rate_limiter import RateLimiter
+
+
+def test_cancelled_async_waiter_leaves_the_queue_without_taking_capacity():
+    limiter = RateLimiter("test", rpm=1)
+    limiter.acquire()  # empties the bucket for a minute
+
+    async def run():
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.05)
+        assert limiter.queue_depth == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+
+    asyncio.run(run())
+    assert limiter.stats()["acquired"] == 1
+
+
+def test_async_waiters_are_served_in_arrival_order():
+    limiter = RateLimiter("test", rpm=600)  # one request every 0.1s once the burst is used
+    for _ in range(600):
+        limiter.acquire()
+    served = []
+
+    async def waiter(index):
+        await limiter.aacquire(timeout=5)
+        served.append(index)
+
+    async def run():
+        await asyncio.gather(*(waiter(i) for i in range(3)))
+
+    asyncio.run(run())
+    assert served == [0, 1, 2]
+
+
+def test_async_timeout():
+    limiter = RateLimiter("test", rpm=1)
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        asyncio.run(limiter.aacquire(timeout=0.1))
+    assert limiter.queue_depth == 0
+
+
+def test_async_calls_forward_streamed_tokens():
+    pytest.importorskip("langchain_core")
+    from langchain.callbacks.base import AsyncCallbackHandler
+    from langchain.llms.base import LLM
+
+    from rate_limiter import RateLimitedLLM
+
+    class Streamer(LLM):
+        @property
+        def _llm_type(self) -> str:
+            return "streamer"
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            return prompt
+
+        async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+            for token in prompt.split():
+                await run_manager.on_llm_new_token(token)
+            return prompt
+
+    class Collector(AsyncCallbackHandler):
+        def __init__(self):
+            self.tokens = []
+
+        async def on_llm_new_token(self, token, **kwargs):
+            self.tokens.append(token)
+
+    collector = Collector()
+    llm = RateLimitedLLM(inner=Streamer(), limiter=RateLimiter("test", rpm=60))
+    asyncio.run(llm.apredict("one two", callbacks=[collector]))
+    assert collector.tokens == ["one", "two"]
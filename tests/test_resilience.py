@@ -0,0 +1,33 @@
+import threading
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, DeadlineExceeded, RetryPolicy
+
+
+def test_hung_call_is_bounded_by_the_deadline():
+    release = threading.Event()
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    policy = RetryPolicy(deadline=0.2, breaker=breaker)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        policy.call(release.wait, 10)
+    release.set()
+    assert time.monotonic() - started < 2
+    assert policy.stats()["deadline_exceeded"] == 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_own_timeout_is_retried_within_the_deadline():
+    outcomes = [TimeoutError("read timed out"), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    policy = RetryPolicy(deadline=5.0, sleep=lambda delay: None)
+    assert policy.call(flaky) == "ok"
+    assert policy.stats()["retries"] == 1